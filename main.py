@@ -1,21 +1,160 @@
 import pygame
 import sys
 import os
+import atexit
+import json
+import re
+import math
+import operator
+import asyncio
+import random
+import heapq
+import time
+import weakref
+import zlib
+from collections import OrderedDict, deque
+
+try:
+    import numpy as np
+except ImportError:
+    np = None  # numpyが無い環境ではパーティクルをリストで処理する
+
+# 変化した領域だけを画面に反映する描画モード（KEMONO_DIRTY_RECTS=1 で有効）
+DIRTY_RECT_RENDERING = os.environ.get("KEMONO_DIRTY_RECTS", "0") == "1"
+# 起動時から計測を有効にする（KEMONO_PROFILE=1）。F3キーで画面表示、F4キーでトレース書き出し
+PROFILE_AT_STARTUP = os.environ.get("KEMONO_PROFILE", "0") == "1"
+# セーブデータのファイル（ブラウザでは localStorage を使う）。空文字ならセーブしない
+SAVE_PATH = os.environ.get("KEMONO_SAVE_PATH", "kemono_save.json")
+# 起動時の画面サイズ（KEMONO_SCREEN_SIZE=1280x720 など）。ウィンドウの大きさを変えると配置も合わせて変わる
+SCREEN_SIZE = tuple(int(v) for v in os.environ.get("KEMONO_SCREEN_SIZE", "800x600").split("x"))
+# ウィンドウの大きさの変更がこの秒数止まってから配置と画像を作り直す（ドラッグ中は作り直さない）
+RESIZE_SETTLE_SECONDS = 0.25
+# ログの出力レベル（debug / info / warning / error）。ブラウザではコンソール出力が重いので warning から
+LOG_LEVEL = os.environ.get("KEMONO_LOG_LEVEL", "warning" if sys.platform == "emscripten" else "info")
+
+class Logger:
+    """レベルで絞り込み、ためてからまとめて書き出すログ
+
+    print は呼ぶたびにコンソールへ同期的に書き込む（ブラウザでは特に遅い）ので、
+    1フレーム分をためておき、flush で1回の書き込みにまとめる。
+    """
+    LEVELS = {"debug": 10, "info": 20, "warning": 30, "error": 40}
+
+    def __init__(self, level="info", max_buffered=100):
+        self.level = self.LEVELS.get(level, self.LEVELS["info"])
+        self.max_buffered = max_buffered
+        self.buffer = []
+
+    def log(self, level, message):
+        if self.LEVELS[level] < self.level:
+            return
+        self.buffer.append(message)
+        if len(self.buffer) >= self.max_buffered:
+            self.flush()
+
+    def debug(self, message):
+        self.log("debug", message)
+
+    def info(self, message):
+        self.log("info", message)
+
+    def warning(self, message):
+        self.log("warning", message)
+
+    def error(self, message):
+        self.log("error", message)
+
+    def flush(self):
+        """ためたログを書き出す（毎フレームの最後に呼ぶ）"""
+        if not self.buffer:
+            return
+        text = "\n".join(self.buffer) + "\n"
+        self.buffer.clear()
+        # 書き出し先は毎回 sys.stdout を見る（ベンチマークでの差し替えに合わせる）
+        sys.stdout.write(text)
+
+log = Logger(LOG_LEVEL)
+atexit.register(log.flush)
 
 # 日本語フォント初期化
+FONT_PATH = "assets/NotoSansJP-VariableFont_wght.ttf"
 try:
-    jp_font = pygame.font.Font("assets/NotoSansJP-VariableFont_wght.ttf", 36)
-    jp_font_large = pygame.font.Font("assets/NotoSansJP-VariableFont_wght.ttf", 48)
-    jp_font_small = pygame.font.Font("assets/NotoSansJP-VariableFont_wght.ttf", 24)
+    jp_font = pygame.font.Font(FONT_PATH, 36)
+    jp_font_large = pygame.font.Font(FONT_PATH, 48)
+    jp_font_small = pygame.font.Font(FONT_PATH, 24)
 except Exception as e:
-    print(f"フォント読み込みエラー: {e}")
+    log.warning(f"フォント読み込みエラー: {e}")
     jp_font = pygame.font.SysFont(None, 36)
     jp_font_large = pygame.font.SysFont(None, 48)
     jp_font_small = pygame.font.SysFont(None, 24)
-import glob
-import math
-import asyncio
-import random
+
+class Layout:
+    """800x600 の基準画面での座標を、実際の画面サイズでの座標に直す
+
+    基準画面を縦横比を保ったまま画面いっぱいに拡大し、余りは上下か左右に均等に空ける。
+    画面サイズが変わると version が増えるので、各部品はそれを見て縮小済みの画像や
+    レイヤーを作り直す（毎フレーム拡大縮小はしない）。
+    """
+    DESIGN_SIZE = (800, 600)
+
+    def __init__(self, size=DESIGN_SIZE, fonts=None):
+        self.version = 0
+        self._base_fonts = dict(fonts or {})  # 画素数 → 読み込み済みのフォント
+        if not self.resize(size):
+            self.resize(self.DESIGN_SIZE)
+
+    def resize(self, size):
+        """画面サイズを変える。幅か高さが0（最小化したときなど）なら何もせず False を返す"""
+        if int(size[0]) <= 0 or int(size[1]) <= 0:
+            return False
+        self.screen_size = (int(size[0]), int(size[1]))
+        design_width, design_height = self.DESIGN_SIZE
+        self.scale = min(self.screen_size[0] / design_width, self.screen_size[1] / design_height)
+        self.offset = ((self.screen_size[0] - design_width * self.scale) / 2,
+                       (self.screen_size[1] - design_height * self.scale) / 2)
+        self._fonts = dict(self._base_fonts)
+        self.version += 1
+        return True
+
+    def point(self, x, y):
+        return (round(self.offset[0] + x * self.scale), round(self.offset[1] + y * self.scale))
+
+    def length(self, value):
+        return max(1, round(value * self.scale))
+
+    def size(self, width, height):
+        return (self.length(width), self.length(height))
+
+    def rect(self, rect):
+        """基準画面の矩形を画面の矩形に直す（隣り合う矩形に隙間ができないよう端を丸める）"""
+        rect = pygame.Rect(rect)
+        left, top = self.point(rect.left, rect.top)
+        right, bottom = self.point(rect.right, rect.bottom)
+        return pygame.Rect(left, top, right - left, bottom - top)
+
+    def centered(self, surface, x, y):
+        """surface を基準画面の x を中心に、y を上端にして置くときの左上"""
+        left, top = self.point(x, y)
+        return (left - surface.get_width() // 2, top)
+
+    def to_design(self, pos):
+        """画面の座標を基準画面の座標に直す（クリックの当たり判定用）"""
+        return (int((pos[0] - self.offset[0]) // self.scale), int((pos[1] - self.offset[1]) // self.scale))
+
+    def font(self, size):
+        """基準画面で size の大きさの日本語フォント（画素数ごとに1つ）"""
+        pixels = self.length(size)
+        font = self._fonts.get(pixels)
+        if font is None:
+            try:
+                font = pygame.font.Font(FONT_PATH, pixels)
+            except Exception:
+                font = pygame.font.SysFont(None, pixels)
+            self._fonts[pixels] = font
+        return font
+
+# 起動時に読み込んだフォントは同じ画素数のときに使い回す
+layout = Layout(SCREEN_SIZE, fonts={36: jp_font, 48: jp_font_large, 24: jp_font_small})
 
 class GameState:
     def __init__(self):
@@ -26,17 +165,683 @@ class GameState:
         self.all_base_collected = False
         self.animals = []
         self.hidden_animals = []
+        # コレクション状況はケモノからの通知で少しずつ数える
+        self.base_total = 0
+        self.base_collected_count = 0
+        self.evolved_count = 0
+        self._base_animal_ids = set()
+        self.listeners = {}  # イベント名 → コールバックのリスト
+
+    def on(self, event_name, callback):
+        """"collected" / "evolved" / "hidden_unlocked" などのイベントを購読する"""
+        self.listeners.setdefault(event_name, []).append(callback)
+
+    def emit(self, event_name, *args):
+        for callback in self.listeners.get(event_name, ()):
+            callback(*args)
+
+    def add_animals(self, animals, hidden=False):
+        for animal in animals:
+            animal.listeners.append(self.handle_animal_event)
+            if hidden:
+                self.hidden_animals.append(animal)
+            else:
+                self.animals.append(animal)
+                self._base_animal_ids.add(id(animal))
+                self.base_total += 1
+                if animal.collected:
+                    self.base_collected_count += 1
+
+    def handle_animal_event(self, event_name, animal):
+        if event_name == "collected":
+            self.collected_animals.append(animal)
+            if id(animal) in self._base_animal_ids:
+                self.base_collected_count += 1
+                self.check_hidden_unlock()
+        elif event_name == "evolved":
+            self.evolved_count += 1
+        self.emit(event_name, animal)
+
+    SAVE_VERSION = 1
+
+    def snapshot(self):
+        """セーブ用の辞書を作る"""
+        return {
+            "version": self.SAVE_VERSION,
+            "selected_animal_index": self.selected_animal_index,
+            "all_base_collected": self.all_base_collected,
+            "animals": {
+                animal.name: animal.snapshot()
+                for animal in self.animals + self.hidden_animals
+            },
+        }
+
+    def restore(self, data):
+        """snapshot() の内容を反映する（画像は読み込まない）"""
+        if data.get("version") != self.SAVE_VERSION:
+            log.warning(f"警告: セーブデータのバージョンが異なるため読み込みません ({data.get('version')})")
+            return False
+        saved_animals = data.get("animals", {})
+        for animal in self.animals + self.hidden_animals:
+            if animal.name in saved_animals:
+                animal.restore(saved_animals[animal.name])
+        base_animals = [a for a in self.animals if id(a) in self._base_animal_ids]
+        self.base_collected_count = sum(1 for a in base_animals if a.collected)
+        self.collected_animals = [a for a in self.animals + self.hidden_animals if a.collected]
+        self.evolved_count = sum(1 for a in self.animals + self.hidden_animals if a.is_evolved)
+        if data.get("all_base_collected") and not self.all_base_collected:
+            self.all_base_collected = True
+            self.animals.extend(self.hidden_animals)
+        self.selected_animal_index = min(data.get("selected_animal_index", 0), len(self.animals) - 1)
+        return True
+
+    def check_hidden_unlock(self):
+        """基本ケモノが全員そろったら隠しケモノを解放する"""
+        if self.all_base_collected or self.base_collected_count < self.base_total:
+            return
+        self.all_base_collected = True
+        if self.hidden_animals:
+            self.animals.extend(self.hidden_animals)
+            self.emit("hidden_unlocked", self.hidden_animals)
+
+    def neighbor_animals(self):
+        """選択中のケモノと前後のケモノ（先読み対象）"""
+        if not self.animals:
+            return []
+        count = len(self.animals)
+        indices = [self.selected_animal_index,
+                   (self.selected_animal_index + 1) % count,
+                   (self.selected_animal_index - 1) % count]
+        return [self.animals[i] for i in dict.fromkeys(indices)]
+
+    def prefetch_neighbors(self, prefetcher):
+        neighbors = self.neighbor_animals()
+        if not neighbors:
+            return
+        prefetcher.request(neighbors[0].visible_images(), ImagePrefetcher.PRIORITY_CURRENT)
+        for animal in neighbors[1:]:
+            prefetcher.request(animal.visible_images(), ImagePrefetcher.PRIORITY_NEIGHBORS)
+        for animal in neighbors:
+            if not animal.is_evolved:
+                prefetcher.request(animal.candidate_evolved_images(), ImagePrefetcher.PRIORITY_EVOLVED)
+
+class SaveStore:
+    """セーブデータの置き場所
+
+    ブラウザ（pygbag）では localStorage、それ以外ではファイルに保存する。
+    ファイルは一時ファイルに書いてから置き換えるので、途中で落ちても壊れない。
+    """
+    WEB_KEY = "kemono_atsume_save"
+
+    def __init__(self, path=SAVE_PATH):
+        self.path = path
+        self.is_web = sys.platform == "emscripten"
+
+    @property
+    def enabled(self):
+        return self.is_web or bool(self.path)
+
+    def read(self):
+        if self.is_web:
+            import platform
+            return platform.window.localStorage.getItem(self.WEB_KEY)
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def write(self, text):
+        if self.is_web:
+            import platform
+            platform.window.localStorage.setItem(self.WEB_KEY, text)
+            return
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(temp_path, self.path)
+
+class Autosaver:
+    """変更があってから delay 秒たったら、描画とは別のタスクでセーブする
+
+    続けて変更があった場合は最後の変更から数え直す（連打中は書き込まない）。
+    """
+    def __init__(self, game_state, store, delay=2.0):
+        self.game_state = game_state
+        self.store = store
+        self.delay = delay
+        self.save_count = 0
+        self._generation = 0
+        self._saved_generation = 0
+        self._dirty = asyncio.Event()
+        self._writing = None  # 別スレッドで書き込み中の Future
+
+    def mark_dirty(self, *args):
+        self._generation += 1
+        self._dirty.set()
+
+    def serialize(self):
+        return json.dumps(self.game_state.snapshot(), ensure_ascii=False, separators=(",", ":"))
+
+    def save(self):
+        if not self.store.enabled:
+            return
+        try:
+            self.store.write(self.serialize())
+            self._saved_generation = self._generation
+            self.save_count += 1
+        except Exception as e:
+            log.warning(f"警告: セーブに失敗しました: {str(e)}")
+
+    def load(self):
+        if not self.store.enabled:
+            return False
+        try:
+            text = self.store.read()
+            if not text:
+                return False
+            return self.game_state.restore(json.loads(text))
+        except Exception as e:
+            log.warning(f"警告: セーブデータの読み込みに失敗しました: {str(e)}")
+            return False
+
+    def flush(self):
+        """未保存の変更があればすぐにセーブする（終了時用）"""
+        if self._generation != self._saved_generation:
+            self.save()
+
+    async def wait_writing(self):
+        """別スレッドでの書き込みが終わるまで待つ（run のタスクを止めても書き込みは止まらないため）"""
+        if self._writing is None:
+            return
+        try:
+            await self._writing
+        except Exception:
+            pass  # 失敗は run の中で記録済み、または flush で書き直す
+
+    async def run(self):
+        while True:
+            await self._dirty.wait()
+            self._dirty.clear()
+            generation = self._generation
+            await asyncio.sleep(self.delay)
+            if generation != self._generation:
+                continue  # 待っている間に変更があったので数え直す
+            if self.store.is_web or not self.store.enabled:
+                self.save()
+            else:
+                text = self.serialize()
+                # タスクが止められても書き込みは続くので、終了時に待てるよう持っておく
+                self._writing = asyncio.ensure_future(asyncio.to_thread(self.store.write, text))
+                try:
+                    await asyncio.shield(self._writing)
+                    self._saved_generation = generation
+                    self.save_count += 1
+                except Exception as e:
+                    log.warning(f"警告: セーブに失敗しました: {str(e)}")
+
+class _ProfilePhase:
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.record(self.name, self.start, time.perf_counter())
+        return False
+
+class _NullPhase:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+class Profiler:
+    """メインループの処理ごとの時間と、画像読み込みなどの回数をフレーム単位で記録する
+
+    記録は Chrome のトレース形式（chrome://tracing や Perfetto で開ける）で書き出せる。
+    """
+    OVERLAY_PHASES = ("events", "Animal.update", "Animal.draw", "Item.draw",
+                      "CollectionScreen.draw", "TitleScreen.draw", "display.flip")
+    OVERLAY_COUNTERS = ("load_image", "font_render", "surfaces")
+
+    def __init__(self, enabled=False, max_events=100000):
+        self.enabled = enabled
+        self.overlay_visible = False
+        self.events = deque(maxlen=max_events)
+        self.frame_index = 0
+        self.last_phases = {}  # 直前のフレームの処理時間（ms）
+        self.last_counts = {}
+        self._phases = {}
+        self._counts = {}
+        self._frame_start = time.perf_counter()
+        self._origin = self._frame_start
+        self._null_phase = _NullPhase()
+        self._font = None
+
+    def phase(self, name):
+        if not self.enabled:
+            return self._null_phase
+        return _ProfilePhase(self, name)
+
+    def record(self, name, start, end):
+        self._phases[name] = self._phases.get(name, 0.0) + (end - start) * 1000
+        self.events.append({
+            "name": name, "ph": "X", "pid": 1, "tid": 1,
+            "ts": (start - self._origin) * 1e6, "dur": (end - start) * 1e6,
+        })
+
+    def count(self, name, n=1):
+        if self.enabled:
+            self._counts[name] = self._counts.get(name, 0) + n
+
+    def end_frame(self):
+        now = time.perf_counter()
+        if self.enabled:
+            self.events.append({
+                "name": "frame", "ph": "X", "pid": 1, "tid": 0,
+                "ts": (self._frame_start - self._origin) * 1e6,
+                "dur": (now - self._frame_start) * 1e6,
+            })
+            self.events.append({
+                "name": "counts", "ph": "C", "pid": 1,
+                "ts": (now - self._origin) * 1e6,
+                "args": {name: self._counts.get(name, 0) for name in self.OVERLAY_COUNTERS},
+            })
+            self.last_phases = self._phases
+            self.last_counts = self._counts
+            self._phases = {}
+            self._counts = {}
+            self.frame_index += 1
+        self._frame_start = now
+
+    def toggle_overlay(self):
+        self.overlay_visible = not self.overlay_visible
+        if self.overlay_visible:
+            self.enabled = True
+
+    def export(self, path="kemono_trace.json"):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": list(self.events), "displayTimeUnit": "ms"}, f)
+        log.info(f"トレースを書き出しました: {path} ({len(self.events)}件)")
+        return path
+
+    def overlay_rect(self):
+        return pygame.Rect(5, 5, 260, 18 * (len(self.OVERLAY_PHASES) + len(self.OVERLAY_COUNTERS)) + 10)
+
+    def draw_overlay(self, screen):
+        """直前のフレームの計測値を左上に表示する（文字は毎フレーム変わるのでキャッシュしない）"""
+        if not self.overlay_visible:
+            return None
+        if self._font is None:
+            self._font = pygame.font.SysFont(None, 20)
+        rect = self.overlay_rect()
+        pygame.draw.rect(screen, (0, 0, 0), rect)
+        lines = [f"{name}: {self.last_phases.get(name, 0.0):.2f} ms" for name in self.OVERLAY_PHASES]
+        lines += [f"{name}: {self.last_counts.get(name, 0)}/frame" for name in self.OVERLAY_COUNTERS]
+        for i, line in enumerate(lines):
+            screen.blit(self._font.render(line, True, (0, 255, 0)), (rect.x + 5, rect.y + 5 + i * 18))
+        return rect
+
+profiler = Profiler(enabled=PROFILE_AT_STARTUP)
+
+class ImageCache:
+    """画像サーフェスのプロセス共通キャッシュ（LRU方式）
+
+    キーは (解決済みパス, 目標サイズ)。メモリ上限を超えた場合は
+    最も長く使われていないものから破棄する。
+    """
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def surface_bytes(surface):
+        # サブサーフェスでも実際の大きさで数える（get_pitch は親の幅になるため）
+        return surface.get_width() * surface.get_height() * surface.get_bytesize()
+
+    def get(self, key):
+        surface = self._entries.get(key)
+        if surface is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return surface
+
+    def put(self, key, surface):
+        if key in self._entries:
+            self.bytes -= self.surface_bytes(self._entries.pop(key))
+        self._entries[key] = surface
+        self.bytes += self.surface_bytes(surface)
+        self.evict()
+
+    def evict(self):
+        # 直前に追加したものだけは残す（上限より大きい画像でも使えるように）
+        while self.bytes > self.max_bytes and len(self._entries) > 1:
+            _, surface = self._entries.popitem(last=False)
+            self.bytes -= self.surface_bytes(surface)
+            self.evictions += 1
+
+    def set_budget(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.evict()
+
+    def variants(self, path):
+        """path の画像で、キャッシュにある大きさ違いのもの（LRUの順番や回数は変えない）"""
+        return [surface for (cached_path, size), surface in self._entries.items()
+                if cached_path == path and size is not None]
+
+    def clear(self):
+        self._entries.clear()
+        self.bytes = 0
+
+    def stats(self):
+        return {
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+class TextCache(ImageCache):
+    """フォント描画結果のキャッシュ
+
+    キーは (フォント, 文字列, 色, アンチエイリアス)。同じ文字列は一度しか描画しない。
+    """
+    def __init__(self, max_bytes=8 * 1024 * 1024):
+        super().__init__(max_bytes)
+
+    def render(self, font, text, color, antialias=True):
+        key = (font, text, tuple(color), antialias)
+        surface = self.get(key)
+        if surface is None:
+            profiler.count("font_render")
+            profiler.count("surfaces")
+            surface = font.render(text, antialias, color)
+            self.put(key, surface)
+        return surface
+
+text_cache = TextCache()
+
+class AssetManifest:
+    """assetsフォルダの画像を「拡張子なしファイル名(小文字) → ファイル名」で引ける索引
+
+    起動時に一度だけ作る。Web版では同梱の manifest.json を読み、実行時にディレクトリを
+    走査しない。デスクトップでは走査は安いので、manifest.json の更新し忘れで新しい画像が
+    見つからないことが無いよう毎回フォルダから作る。
+    """
+    MANIFEST_NAME = "manifest.json"
+    VERSION = 1
+    IMAGE_EXTENSIONS = (".png",)
+
+    def __init__(self, directory, files):
+        self.directory = directory
+        self.files = files
+
+    @staticmethod
+    def build_index(filenames):
+        files = {}
+        aliases = {}
+        for filename in sorted(filenames):
+            stem, ext = os.path.splitext(filename)
+            if ext.lower() not in AssetManifest.IMAGE_EXTENSIONS:
+                continue
+            files.setdefault(stem.lower(), filename)
+            # fish_1.png を "fish" でも引けるようにする（旧glob検索との互換）
+            alias = re.sub(r"_\d+$", "", stem).lower()
+            if alias != stem.lower():
+                aliases.setdefault(alias, filename)
+        for alias, filename in aliases.items():
+            files.setdefault(alias, filename)
+        return files
+
+    @classmethod
+    def build(cls, directory):
+        try:
+            filenames = os.listdir(directory)
+        except OSError as e:
+            log.warning(f"警告: アセットフォルダを読み込めません ({directory}): {str(e)}")
+            filenames = []
+        return cls(directory, cls.build_index(filenames))
+
+    @classmethod
+    def load(cls, directory):
+        if sys.platform != "emscripten":
+            return cls.build(directory)
+        manifest_path = os.path.join(directory, cls.MANIFEST_NAME)
+        try:
+            with open(manifest_path, encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == cls.VERSION:
+                return cls(directory, data["files"])
+            log.warning(f"警告: manifestのバージョンが異なるため再生成します ({manifest_path})")
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            log.warning(f"警告: manifestの読み込みに失敗しました ({manifest_path}): {str(e)}")
+        return cls.build(directory)
+
+    def save(self):
+        manifest_path = os.path.join(self.directory, self.MANIFEST_NAME)
+        with open(manifest_path, "w", encoding="utf-8") as f:
+            json.dump({"version": self.VERSION, "files": self.files}, f, ensure_ascii=False, indent=2, sort_keys=True)
+            f.write("\n")
+        return manifest_path
+
+    def resolve(self, stem):
+        filename = self.files.get(stem.lower())
+        if filename is None:
+            return None
+        return os.path.join(self.directory, filename)
+
+class BakedAssets:
+    """tools/bake_assets.py で作った縮小済みのアトラス（assets/baked）
+
+    表示サイズごとに1枚のアトラスを zlib 圧縮した RGBA で持ち、manifest.json に
+    「画像パス → アトラス上の範囲」を記録している。アトラスは最初に使うときに展開する。
+    焼いたときの元画像の大きさと CRC32 も記録しておく。実行時は元画像を読まずに大きさだけを
+    比べ、違っていたらその画像は使わない。中身まで比べるのはビルド前の
+    tools/bake_assets.py --check（stale_sources）で行う。
+    """
+    DIRECTORY = "assets/baked"
+    MANIFEST_NAME = "manifest.json"
+    VERSION = 2
+
+    def __init__(self, directory, atlases, sources):
+        self.directory = directory
+        self.atlases = atlases
+        self.sources = sources  # 画像パス → {"size": バイト数, "crc32": 値}
+        self._surfaces = {}
+        self._fresh = {}  # 画像パス → 元画像が焼いたときのままか
+
+    @staticmethod
+    def source_info(path):
+        """元画像の大きさと CRC32（焼いたときと同じか調べるのに使う）"""
+        with open(path, "rb") as f:
+            data = f.read()
+        return {"size": len(data), "crc32": zlib.crc32(data)}
+
+    @staticmethod
+    def size_key(size):
+        return f"{size[0]}x{size[1]}"
+
+    @classmethod
+    def load(cls, directory=DIRECTORY):
+        manifest_path = os.path.join(directory, cls.MANIFEST_NAME)
+        try:
+            with open(manifest_path, encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            log.warning(f"警告: 縮小済みアセットの読み込みに失敗しました ({manifest_path}): {str(e)}")
+            return None
+        if data.get("version") != cls.VERSION:
+            log.warning(f"警告: 縮小済みアセットのバージョンが異なるため使いません ({manifest_path})")
+            return None
+        return cls(directory, data["atlases"], data.get("sources", {}))
+
+    def is_fresh(self, path):
+        """元画像の大きさが焼いたときのままなら True（パスごとに一度だけ調べる）
+
+        描画中に呼ばれるので元画像は読まない（ファイルの大きさを見るだけ）。
+        """
+        fresh = self._fresh.get(path)
+        if fresh is None:
+            recorded = self.sources.get(path)
+            try:
+                fresh = recorded is not None and os.path.getsize(path) == recorded["size"]
+            except OSError:
+                fresh = False
+            if not fresh:
+                log.warning(f"警告: 元画像が変わっているため縮小済みアセットを使いません ({path})")
+            self._fresh[path] = fresh
+        return fresh
+
+    def stale_sources(self):
+        """焼いたときから中身が変わった元画像のパス（ビルド前の確認用。元画像をすべて読む）"""
+        stale = []
+        for path, recorded in sorted(self.sources.items()):
+            try:
+                if self.source_info(path) != recorded:
+                    stale.append(path)
+            except OSError:
+                stale.append(path)
+        return stale
+
+    def _atlas_surface(self, size_key):
+        surface = self._surfaces.get(size_key)
+        if surface is None:
+            atlas = self.atlases[size_key]
+            with open(os.path.join(self.directory, atlas["file"]), "rb") as f:
+                pixels = zlib.decompress(f.read())
+            surface = pygame.image.frombuffer(pixels, tuple(atlas["size"]), "RGBA").convert_alpha()
+            profiler.count("surfaces")
+            self._surfaces[size_key] = surface
+        return surface
+
+    def variants(self, path):
+        """path の画像で、焼いてあるすべての大きさのもの"""
+        path = path.replace(os.sep, "/")
+        return [self.lookup(path, atlas["entries"][path][2:])
+                for atlas in self.atlases.values() if path in atlas["entries"]]
+
+    def lookup(self, path, size):
+        """縮小済みの画像があればアトラスの一部として返す（無ければ None）"""
+        if not size:
+            return None
+        atlas = self.atlases.get(self.size_key(size))
+        path = path.replace(os.sep, "/")
+        if atlas is None or path not in atlas["entries"] or not self.is_fresh(path):
+            return None
+        try:
+            return self._atlas_surface(self.size_key(size)).subsurface(atlas["entries"][path])
+        except Exception as e:
+            log.warning(f"警告: 縮小済みアセットを使えません ({path}): {str(e)}")
+            return None
 
 class AssetLoader:
+    image_cache = ImageCache()
+    provisional = weakref.WeakSet()  # 手元の小さい画像を拡大しただけの仮の画像
+    _manifests = {}
+    _baked = None
+    _baked_checked = False
+
+    @staticmethod
+    def get_baked():
+        if not AssetLoader._baked_checked:
+            AssetLoader._baked = BakedAssets.load()
+            AssetLoader._baked_checked = True
+        return AssetLoader._baked
+
     @staticmethod
-    def load_image(path, target_size=None):
+    def get_manifest(directory):
+        manifest = AssetLoader._manifests.get(directory)
+        if manifest is None:
+            manifest = AssetManifest.load(directory)
+            AssetLoader._manifests[directory] = manifest
+        return manifest
+
+    @staticmethod
+    def resolve_path(path):
+        """assets/foo.png のような指定を実在するファイルパスに解決する"""
+        directory, filename = os.path.split(os.path.normpath(path))
+        stem = os.path.splitext(filename)[0]
+        return AssetLoader.get_manifest(directory or ".").resolve(stem)
+
+    @staticmethod
+    def load_image(path, target_size=None, quick=False):
+        """画像を target_size に収めて読み込む
+
+        同じ画像の別の大きさのもの（キャッシュや縮小済みアトラス）が手元にあれば、
+        元画像を展開せずにそれを拡大縮小する。quick=True なら手元のものが小さくても
+        拡大して仮の画像として返す（quick=False で読み直すと元画像から作り直す）。
+        """
+        profiler.count("load_image")
+        resolved = AssetLoader.resolve_path(path)
+        key = (resolved or path, tuple(target_size) if target_size else None)
+        cached = AssetLoader.image_cache.get(key)
+        if cached is not None and (quick or cached not in AssetLoader.provisional):
+            return cached
+        image = None
+        if cached is None:
+            baked = AssetLoader.get_baked()
+            image = baked.lookup(resolved, target_size) if baked and resolved else None
+        if image is None and target_size and resolved:
+            image = AssetLoader._rescale_variant(resolved, tuple(target_size), quick)
+        if image is None:
+            image = AssetLoader._decode_image(path, resolved, target_size)
+        AssetLoader.image_cache.put(key, image)
+        return image
+
+    @staticmethod
+    def _rescale_variant(resolved, target_size, allow_upscale):
+        """手元にある同じ画像の一番大きいものを target_size に拡大縮小する（無ければ None）"""
+        variants = AssetLoader.image_cache.variants(resolved)
+        baked = AssetLoader.get_baked()
+        if baked:
+            variants += baked.variants(resolved)
+        target_ratio = target_size[0] / target_size[1]
+        source = None
+        for surface in variants:
+            if surface is None or surface in AssetLoader.provisional:
+                continue
+            width, height = surface.get_size()
+            # 縦横比が違うと余白の付き方が変わるので使わない
+            if abs(width / height - target_ratio) > 0.02:
+                continue
+            if source is None or width > source.get_width():
+                source = surface
+        if source is None:
+            return None
+        upscale = source.get_width() < target_size[0]
+        if upscale and not allow_upscale:
+            return None
+        image = pygame.transform.smoothscale(source, target_size)
+        profiler.count("surfaces")
+        if upscale:
+            AssetLoader.provisional.add(image)
+        return image
+
+    @staticmethod
+    def _decode_image(path, resolved, target_size=None):
         try:
-            base_name = os.path.splitext(path)[0]
-            files = glob.glob(f"./{base_name}*.png") + glob.glob(f"./{base_name}*.PNG")  # Web用相対パス指定追加
-            if not files:
+            if not resolved:
                 raise FileNotFoundError(f"ファイルが見つかりません: {path}")
             
-            original_image = pygame.image.load(files[0]).convert_alpha()
+            original_image = pygame.image.load(resolved).convert_alpha()
+            profiler.count("surfaces")
             
             if target_size:
                 width, height = original_image.get_size()
@@ -44,6 +849,7 @@ class AssetLoader:
                 new_size = (int(width*ratio), int(height*ratio))
                 
                 resized_image = pygame.Surface(target_size, pygame.SRCALPHA)
+                profiler.count("surfaces", 2)
                 scaled = pygame.transform.smoothscale(original_image, new_size)
                 
                 x = (target_size[0] - new_size[0]) // 2
@@ -52,8 +858,9 @@ class AssetLoader:
                 return resized_image
             return original_image
         except Exception as e:
-            print(f"警告: 画像の読み込みに失敗しました ({path}): {str(e)}")
+            log.warning(f"警告: 画像の読み込みに失敗しました ({path}): {str(e)}")
             placeholder = pygame.Surface(target_size or (50, 50), pygame.SRCALPHA)
+            profiler.count("surfaces")
             color = (255, 0, 0) if not target_size or target_size[0] > 100 else (0, 255, 0)
             if target_size:
                 pygame.draw.rect(placeholder, color, (0, 0, target_size[0], target_size[1]))
@@ -65,29 +872,459 @@ class AssetLoader:
     def load_sound(path):
         try:
             sound = pygame.mixer.Sound(path)
-            print(f"サウンド読み込み成功: {path}")
+            log.debug(f"サウンド読み込み成功: {path}")
             return sound
         except Exception as e:
-            print(f"警告: サウンドの読み込みに失敗しました ({path}): {str(e)}")
+            log.warning(f"警告: サウンドの読み込みに失敗しました ({path}): {str(e)}")
+            return None
+
+class AudioManager:
+    """効果音をカテゴリごとに決まったチャンネルで鳴らす
+
+    チャンネルはカテゴリごとの同時発音数の合計だけ確保し、使い切ったら
+    一番古い音を止めて鳴らす。同じ音が dedupe_ms 以内に続いた場合は鳴らさない。
+    """
+    def __init__(self, voice_limits=None, dedupe_ms=80):
+        self.voice_limits = voice_limits or {"item": 2, "reward": 2, "ui": 1}
+        self.dedupe_ms = dedupe_ms
+        self.sounds = {}  # 名前 → (Sound, カテゴリ)
+        self.channels = {}  # カテゴリ → [Channel]
+        self.skipped = 0
+        self._loaded = {}  # パス → Sound（同じファイルは一度だけ読み込む）
+        self._last_played = {}
+        self._started = {}  # Channel → 鳴らし始めた時刻
+
+    def init_channels(self):
+        try:
+            total = sum(self.voice_limits.values())
+            pygame.mixer.set_num_channels(total)
+            pygame.mixer.set_reserved(total)  # 他の Sound.play() に使わせない
+            index = 0
+            for category, limit in self.voice_limits.items():
+                self.channels[category] = [pygame.mixer.Channel(index + i) for i in range(limit)]
+                index += limit
+        except Exception as e:
+            log.warning(f"警告: サウンドチャンネルの初期化に失敗しました: {str(e)}")
+
+    def load(self, name, path, category):
+        if path not in self._loaded:
+            self._loaded[path] = AssetLoader.load_sound(path)
+        self.sounds[name] = (self._loaded[path], category)
+
+    def play(self, name):
+        sound, category = self.sounds.get(name, (None, None))
+        channels = self.channels.get(category)
+        if sound is None or not channels:
+            return
+        now = pygame.time.get_ticks()
+        last = self._last_played.get(name)
+        if last is not None and now - last < self.dedupe_ms:
+            self.skipped += 1
+            return
+        self._last_played[name] = now
+        channel = next((c for c in channels if not c.get_busy()), None)
+        if channel is None:
+            channel = min(channels, key=lambda c: self._started.get(c, 0))
+            channel.stop()
+        channel.play(sound)
+        self._started[channel] = now
+
+    async def play_bgm(self, path, volume):
+        """BGMを読み込んで流す（起動を止めないよう、最初のフレームの後に呼ぶ）"""
+        await asyncio.sleep(0)
+        try:
+            pygame.mixer.music.load(path)
+            pygame.mixer.music.set_volume(volume)
+            pygame.mixer.music.play(-1)
+            log.debug(f"BGM再生: {path} (音量: {volume})")
+        except Exception as e:
+            log.warning(f"警告: BGMの読み込みに失敗しました: {str(e)}")
+
+class LazyImage:
+    """初めて使われるまで読み込まない画像ハンドル
+
+    画像そのものは AssetLoader.image_cache が持ち、ハンドルは弱参照だけを持つ。
+    キャッシュから追い出された画像は、次に使うときに読み込み直す。
+    get() は描画を待たせないよう手元の画像の拡大で済ませることがあり、その場合は
+    loaded が False のままなので、先読みの load() で元画像から読み直される。
+    """
+    def __init__(self, path, target_size=None):
+        self.path = path
+        self.target_size = target_size
+        self._surface = None  # weakref.ref
+
+    def _current(self):
+        return self._surface() if self._surface is not None else None
+
+    @property
+    def loaded(self):
+        surface = self._current()
+        return surface is not None and surface not in AssetLoader.provisional
+
+    @property
+    def provisional(self):
+        """仮の画像で表示できている（きちんと読み込むのは急がなくてよい）"""
+        surface = self._current()
+        return surface is not None and surface in AssetLoader.provisional
+
+    def get(self):
+        surface = self._current()
+        if surface is None:
+            surface = AssetLoader.load_image(self.path, self.target_size, quick=True)
+            self._surface = weakref.ref(surface)
+        return surface
+
+    def load(self):
+        """仮の画像ではなく、きちんとした画像を読み込む（先読み用）"""
+        if not self.loaded:
+            self._surface = weakref.ref(AssetLoader.load_image(self.path, self.target_size))
+
+    def release(self):
+        self._surface = None
+
+    def resize(self, target_size):
+        """表示する大きさを変える（次に使うときにその大きさで読み込む）"""
+        target_size = tuple(target_size)
+        if self.target_size is not None and tuple(self.target_size) != target_size:
+            self.target_size = target_size
+            self._surface = None
+
+class ImagePrefetcher:
+    """asyncioループの空き時間に画像を優先度順に先読みする
+
+    1回に1枚だけ読み込んではループに処理を返し、描画を止めないようにする。
+    優先度の数字が小さいものから読み込む。scheduler を渡すと、次のフレームの締め切りまでに
+    1枚読み込めるだけの時間があるときだけ読み込む（表示中の画像と進化先は待たずに読むが、
+    仮の画像で表示できているものの読み直しは待つ）。1枚が待機中の1フレームより重くても
+    止まってしまわないよう、待機中の1フレームの間ずっと待たされたら1枚は読み込む。
+    """
+    PRIORITY_CURRENT = 0    # 表示中のケモノ
+    PRIORITY_ITEMS = 1      # アイテム欄
+    PRIORITY_NEIGHBORS = 2  # 前後のケモノ
+    PRIORITY_EVOLVED = 3    # 進化先
+
+    def __init__(self, scheduler=None):
+        self.scheduler = scheduler
+        self.decode_estimate = 0.0  # 1枚の読み込みにかかる時間の見積もり（秒）
+        self._deferred_since = None  # 締め切りのせいで待ち始めた時刻
+        self._queue = []  # (優先度, 登録順, ハンドル)
+        self._queued = {}  # ハンドル → 登録済みの一番高い優先度
+        self._counter = 0
+        self.requested = 0
+        self.completed = 0
+        self._wakeup = asyncio.Event()
+
+    def request(self, handles, priority=PRIORITY_NEIGHBORS):
+        for handle in handles:
+            if handle is None or handle.loaded:
+                continue
+            queued_priority = self._queued.get(handle)
+            if queued_priority is not None and queued_priority <= priority:
+                continue
+            if queued_priority is None:
+                self.requested += 1
+            # 優先度を上げる場合は古い登録を残したまま追加し、取り出すときに読み飛ばす
+            self._queued[handle] = priority
+            heapq.heappush(self._queue, (priority, self._counter, handle))
+            self._counter += 1
+        if self._queue:
+            self._wakeup.set()
+
+    @property
+    def pending(self):
+        return len(self._queued)
+
+    @property
+    def progress(self):
+        """これまでに頼まれた画像のうち読み込み済みの割合（0.0〜1.0）"""
+        return self.completed / self.requested if self.requested else 1.0
+
+    async def run(self):
+        while True:
+            if not self._queue:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            priority, _, handle = self._queue[0]
+            if self._queued.get(handle) != priority:
+                heapq.heappop(self._queue)
+                continue  # 読み込み済みか、より高い優先度で登録し直されたもの
+            urgent = priority == self.PRIORITY_CURRENT and not handle.provisional
+            if self.scheduler and not urgent and not handle.loaded:
+                time_left = self.scheduler.time_left()
+                if time_left < self.decode_estimate:
+                    now = time.perf_counter()
+                    if self._deferred_since is None:
+                        self._deferred_since = now
+                    starved = (not self.scheduler.active
+                               and now - self._deferred_since >= self.scheduler.idle_frame_time)
+                    if not starved:
+                        # 今読むと次のフレームに食い込むので、締め切りを過ぎてから見直す
+                        await asyncio.sleep(max(0.0, time_left) + 0.001)
+                        continue
+            self._deferred_since = None
+            heapq.heappop(self._queue)
+            del self._queued[handle]
+            if not handle.loaded:
+                started = time.perf_counter()
+                handle.load()
+                # 見積もりは大きめに保ち、小さい読み込みが続いたら少しずつ下げる
+                # （待機中の1フレームより大きくしても読める機会が無くなるだけなので、そこで止める）
+                elapsed = time.perf_counter() - started
+                estimate = max(elapsed, self.decode_estimate * 0.8)
+                self.decode_estimate = min(estimate, self.scheduler.idle_frame_time) if self.scheduler else estimate
+            self.completed += 1
+            await asyncio.sleep(0)
+
+class BounceFrames:
+    """跳ねるアニメーション用の拡大済みフレーム
+
+    各フレームのサイズとずれを先に計算しておき、拡大画像はサイズごとに
+    一度だけ作る（sinカーブは左右対称なので同じサイズが2回ずつ出る）。
+    """
+    def __init__(self, image, duration, lift=10):
+        self.image = image
+        self.sizes = []
+        self.offsets = []
+        width, height = image.get_size()
+        for frame in range(duration):
+            phase = math.sin(math.pi * frame / duration)
+            scale = 1.0 + 0.1 * phase
+            self.sizes.append((int(width * scale), int(height * scale)))
+            self.offsets.append(-lift * phase)
+        self._scaled = {}
+
+    def frame(self, index):
+        size = self.sizes[index]
+        scaled = self._scaled.get(size)
+        if scaled is None:
+            scaled = pygame.transform.smoothscale(self.image, size)
+            profiler.count("surfaces")
+            self._scaled[size] = scaled
+        return scaled
+
+    def blit(self, screen, center, index):
+        scaled = self.frame(index)
+        rect = scaled.get_rect(center=(center[0], center[1] + self.offsets[index]))
+        return screen.blit(scaled, rect)
+
+class ParticleSystem:
+    """位置・速度・寿命を平たい配列で持つパーティクル
+
+    numpyがあれば更新も描画もまとめて行い、パーティクルごとのPythonループを回さない。
+    描画は使い回しの透明レイヤーに点を打ち、画面へは1回だけblitする。
+    """
+    FIELDS = ("x", "y", "vx", "vy", "life", "max_life")
+
+    def __init__(self, size, color, capacity=4096, gravity=0.0, dot_size=2):
+        self.size = size
+        self.color = color
+        self.capacity = capacity
+        self.gravity = gravity
+        self.dot_size = dot_size
+        self.count = 0
+        self.version = 0  # 更新のたびに増える（描画状態の比較用）
+        self.layer = None
+        for field in self.FIELDS:
+            setattr(self, field, np.zeros(capacity, np.float32) if np is not None else [])
+
+    def emit(self, n, pos, speed=(1.0, 4.0), life=(20, 45)):
+        """pos から全方向へ n 個放出する"""
+        n = min(n, self.capacity - self.count)
+        if n <= 0:
+            return
+        if np is not None:
+            angle = np.random.uniform(0, 2 * math.pi, n)
+            velocity = np.random.uniform(speed[0], speed[1], n)
+            lifetime = np.random.randint(life[0], life[1] + 1, n)
+            new = slice(self.count, self.count + n)
+            self.x[new] = pos[0]
+            self.y[new] = pos[1]
+            self.vx[new] = np.cos(angle) * velocity
+            self.vy[new] = np.sin(angle) * velocity
+            self.life[new] = lifetime
+            self.max_life[new] = lifetime
+        else:
+            for _ in range(n):
+                angle = random.uniform(0, 2 * math.pi)
+                velocity = random.uniform(speed[0], speed[1])
+                lifetime = random.randint(life[0], life[1])
+                self.x.append(pos[0])
+                self.y.append(pos[1])
+                self.vx.append(math.cos(angle) * velocity)
+                self.vy.append(math.sin(angle) * velocity)
+                self.life.append(lifetime)
+                self.max_life.append(lifetime)
+        self.count += n
+
+    def update(self):
+        if self.count == 0:
+            return
+        n = self.count
+        if np is not None:
+            self.x[:n] += self.vx[:n]
+            self.y[:n] += self.vy[:n]
+            self.vy[:n] += self.gravity
+            self.life[:n] -= 1
+            alive = self.life[:n] > 0
+            self.count = int(alive.sum())
+            if self.count < n:
+                # 生きているものを先頭に詰める
+                for field in self.FIELDS:
+                    values = getattr(self, field)
+                    values[:self.count] = values[:n][alive]
+        else:
+            particles = [
+                (x + vx, y + vy, vx, vy + self.gravity, life - 1, max_life)
+                for x, y, vx, vy, life, max_life in zip(self.x, self.y, self.vx, self.vy, self.life, self.max_life)
+                if life > 1
+            ]
+            columns = list(zip(*particles)) if particles else [()] * len(self.FIELDS)
+            for field, values in zip(self.FIELDS, columns):
+                setattr(self, field, list(values))
+            self.count = len(particles)
+        self.version += 1
+
+    def clear(self):
+        self.count = 0
+        if np is None:
+            for field in self.FIELDS:
+                setattr(self, field, [])
+
+    def draw(self, screen):
+        if self.count == 0:
             return None
+        if self.layer is None:
+            self.layer = pygame.Surface(self.size, pygame.SRCALPHA)
+            profiler.count("surfaces")
+        self.layer.fill((0, 0, 0, 0))
+        n = self.count
+        if np is not None:
+            xs = self.x[:n].astype(np.int32)
+            ys = self.y[:n].astype(np.int32)
+            alpha = (255 * self.life[:n] / self.max_life[:n]).astype(np.uint8)
+            width, height = self.size
+            rgb = pygame.surfarray.pixels3d(self.layer)
+            alphas = pygame.surfarray.pixels_alpha(self.layer)
+            for dx in range(self.dot_size):
+                for dy in range(self.dot_size):
+                    px = xs + dx
+                    py = ys + dy
+                    inside = (px >= 0) & (px < width) & (py >= 0) & (py < height)
+                    rgb[px[inside], py[inside]] = self.color
+                    alphas[px[inside], py[inside]] = alpha[inside]
+            del rgb, alphas  # Surfaceのロックを解除
+        else:
+            for x, y, life, max_life in zip(self.x, self.y, self.life, self.max_life):
+                color = (*self.color, int(255 * life / max_life))
+                pygame.draw.rect(self.layer, color, (int(x), int(y), self.dot_size, self.dot_size))
+        return screen.blit(self.layer, (0, 0))
 
 class Item:
+    IMAGE_SIZE = (50, 50)
+
     def __init__(self, name, item_type, image_path, power=1):
         self.name = name
         self.type = item_type
         self.power = power
-        self.image = AssetLoader.load_image(image_path, (50, 50))
-        self.rect = pygame.Rect(0, 0, 50, 50)
+        self.image_path = AssetLoader.resolve_path(image_path) or image_path
+        self.design_rect = pygame.Rect((0, 0), self.IMAGE_SIZE)  # 基準画面での位置（当たり判定用）
+        self.rect = layout.rect(self.design_rect)
+        self.image_handle = LazyImage(self.image_path, self.rect.size)
+        self.layout_version = layout.version
+        self.drawn_rects = []
+
+    @property
+    def image(self):
+        return self.image_handle.get()
+
+    def render_key(self):
+        return self.rect.topleft
+
+    def apply_layout(self):
+        """画面サイズが変わっていたら位置と画像の大きさを合わせる"""
+        if self.layout_version == layout.version:
+            return
+        self.layout_version = layout.version
+        self.rect = layout.rect(self.design_rect)
+        self.image_handle.resize(self.rect.size)
 
-    def draw(self, screen, pos):
-        self.rect.topleft = pos
-        screen.blit(self.image, self.rect)
+    def draw(self, screen):
+        self.apply_layout()
+        self.drawn_rects = [screen.blit(self.image, self.rect)]
+
+class EvolutionRules:
+    """進化先の分岐条件（アイテムを使った回数で決まる）
+
+    branches は上から順に調べ、conditions をすべて満たした最初の分岐の画像になる。
+    条件は [左辺, 演算子, 右辺] の形で、左辺・右辺はアイテム名（使った回数）か数値。
+    どれにも当てはまらなければ default の画像になる。
+    """
+    OPERATORS = {
+        ">=": operator.ge, ">": operator.gt, "==": operator.eq,
+        "<=": operator.le, "<": operator.lt, "!=": operator.ne,
+    }
+
+    def __init__(self, branches, default):
+        self.branches = branches
+        self.default = default
+
+    @classmethod
+    def from_data(cls, evolved_image, base_image):
+        """kemono_data.json の evolved_image（文字列か辞書）から作る"""
+        if isinstance(evolved_image, str):
+            return cls([], evolved_image)
+        if "branches" in evolved_image:
+            return cls(evolved_image["branches"], evolved_image.get("default", base_image))
+        # 旧形式の不死鳥用 {"flame", "sun", "true"}（閾値5回）
+        return cls([
+            {"name": "true", "image": evolved_image["true"], "message": "≪真の不死鳥が目覚めた！≫",
+             "conditions": [["Fire", ">=", 5], ["Sun", ">=", 5], ["Fire", "==", "Sun"]]},
+            {"name": "flame", "image": evolved_image["flame"],
+             "conditions": [["Fire", ">=", 5], ["Fire", ">", "Sun"]]},
+            {"name": "sun", "image": evolved_image["sun"],
+             "conditions": [["Sun", ">=", 5], ["Sun", ">", "Fire"]]},
+        ], base_image)
+
+    def resolved(self, resolve):
+        """画像パスを resolve で実ファイルに直したコピーを返す"""
+        branches = [dict(branch, image=resolve(branch["image"])) for branch in self.branches]
+        return EvolutionRules(branches, resolve(self.default))
+
+    @staticmethod
+    def _value(term, item_counts):
+        return item_counts.get(term, 0) if isinstance(term, str) else term
+
+    def matches(self, branch, item_counts):
+        return all(
+            self.OPERATORS[op](self._value(left, item_counts), self._value(right, item_counts))
+            for left, op, right in branch.get("conditions", [])
+        )
+
+    def choose(self, item_counts):
+        """使った回数に合う分岐を返す（当てはまらなければ None）"""
+        for branch in self.branches:
+            if self.matches(branch, item_counts):
+                return branch
+        return None
+
+    def candidate_images(self):
+        return [branch["image"] for branch in self.branches] + [self.default]
 
 class Animal:
+    # 親密度のしきい値
+    COLLECT_AFFECTION = 50
+    EVOLVE_AFFECTION = 100
+    PREFETCH_AFFECTION = 80  # 進化先の画像を先読みし始める親密度
+    MAX_AFFECTION = EVOLVE_AFFECTION  # 親密度の上限（進化できる値より上は貯めない）
+    IMAGE_SIZE = (300, 300)
+    DESIGN_RECT = pygame.Rect(250, 150, 300, 300)  # 基準画面での表示位置
+
     def __init__(self, name, favorite_food, favorite_toy, base_image, evolved_image):
         self.name = name
         self.favorite_food = favorite_food
         self.favorite_toy = favorite_toy
+        self.listeners = []  # callback(イベント名, ケモノ)
         self.affection = 0
         self.collected = False
         self.is_evolved = False
@@ -95,67 +1332,189 @@ class Animal:
         self.animation_frame = 0
         self.animation_duration = 30  # 0.5秒間（60fps想定）
         
-        # 画像のパスを保存
-        self.base_image_path = base_image
-        self.evolved_image_path = evolved_image
+        self.item_counts = {}  # アイテム名 → 使った回数（進化の分岐に使う）
         
-        # 画像の読み込み
-        self.base_image = AssetLoader.load_image(base_image, (300, 300))
-        # 進化画像が辞書型の場合は初期化時には読み込まない
-        if isinstance(evolved_image, dict):
+        # 画像のパスを保存（索引で実ファイルに解決しておく）
+        self.base_image_path = AssetLoader.resolve_path(base_image) or base_image
+        self.evolution = EvolutionRules.from_data(evolved_image, base_image).resolved(
+            lambda path: AssetLoader.resolve_path(path) or path)
+        
+        # 画像は最初の描画時に読み込む（大きさは画面に合わせる）
+        self.rect = layout.rect(self.DESIGN_RECT)
+        self.layout_version = layout.version
+        self.base_image = LazyImage(self.base_image_path, self.rect.size)
+        self._evolved_handles = {}
+        # 分岐がある場合は進化時に決まる
+        if self.evolution.branches:
             self.evolved_image = None
         else:
-            self.evolved_image = AssetLoader.load_image(evolved_image, (300, 300))
-        self.image = self.base_image
-        self.rect = self.image.get_rect(center=(400, 300))
+            self.evolved_image = self.evolved_handle(self.evolution.default)
+        self.current_image = self.base_image
+        self.drawn_rects = []
+        self.bounce_frames = None
+        self.fade_source = None
+        self.fade_surface = None
+        self.effect_layer = None
+        self.particles = ParticleSystem(layout.screen_size, (255, 215, 0), gravity=0.05)
+
+    @property
+    def image(self):
+        return self.current_image.get()
+
+    @property
+    def fire_count(self):
+        return self.item_counts.get("Fire", 0)
+
+    @property
+    def sun_count(self):
+        return self.item_counts.get("Sun", 0)
+
+    def evolved_handle(self, path):
+        """進化先の画像ハンドル（パスごとに1つ）"""
+        if path == self.base_image_path:
+            return self.base_image
+        handle = self._evolved_handles.get(path)
+        if handle is None:
+            handle = LazyImage(path, self.rect.size)
+            self._evolved_handles[path] = handle
+        return handle
+
+    def candidate_evolved_images(self):
+        """進化先になりうる画像すべて（進化直前の先読み用）"""
+        return [self.evolved_handle(path) for path in self.evolution.candidate_images()]
+
+    def record_item_use(self, item_name):
+        self.item_counts[item_name] = self.item_counts.get(item_name, 0) + 1
+        self.notify("item_used")
+
+    def render_key(self):
+        return (id(self.current_image), self.affection, self.is_evolved,
+                self.is_animating, self.animation_frame, self.particles.version)
+
+    def release_caches(self):
+        """表示されなくなったケモノのアニメーション用キャッシュと画像への参照を捨てる"""
+        self.bounce_frames = None
+        self.fade_source = None
+        self.fade_surface = None
+        self.effect_layer = None
+        self.particles.clear()
+        self.particles.layer = None
+        # 画像はキャッシュに任せ、ハンドルからは手放す
+        self.base_image.release()
+        for handle in self._evolved_handles.values():
+            handle.release()
+
+    def apply_layout(self):
+        """画面サイズが変わっていたら、画像とアニメーション用のキャッシュを作り直す"""
+        if self.layout_version == layout.version:
+            return
+        self.layout_version = layout.version
+        self.rect = layout.rect(self.DESIGN_RECT)
+        self.base_image.resize(self.rect.size)
+        for handle in self._evolved_handles.values():
+            handle.resize(self.rect.size)
+        self.release_caches()
+        self.particles.size = layout.screen_size
+
+    def build_effect_layer(self):
+        """止まっている進化エフェクトの粒を1枚の透明レイヤーに焼き込む"""
+        layer = pygame.Surface(layout.screen_size, pygame.SRCALPHA)
+        profiler.count("surfaces")
+        radius = layout.length(3)
+        for i, (x, y) in enumerate(self.effect_particles):
+            alpha = 255 * (1 - i/len(self.effect_particles))
+            pygame.draw.circle(layer, (255, 215, 0, int(alpha)), layout.point(x, y), radius)
+        return layer
+
+    def faded_image(self, alpha):
+        """フェードイン用に透明度を変えた画像（コピーは画像ごとに一度だけ作る）"""
+        image = self.image
+        if self.fade_source is not image:
+            self.fade_source = image
+            self.fade_surface = image.copy()
+            profiler.count("surfaces")
+        self.fade_surface.set_alpha(alpha)
+        return self.fade_surface
+
+    def visible_images(self):
+        """今の状態で描画に必要な画像ハンドル（先読み用）"""
+        return [self.current_image]
         
     def evolve(self):
         """ケモノを進化させる"""
         self.is_evolved = True
         
-        # 進化画像が辞書型の場合の処理
-        if isinstance(self.evolved_image_path, dict):
-            # 使用回数に基づいて進化形態を決定
-            # 進化条件を閾値5回に修正
-            if self.fire_count >= 5 and self.sun_count >= 5 and self.fire_count == self.sun_count:
-                image_path = self.evolved_image_path["true"]
-                print("≪真の不死鳥が目覚めた！≫")
-            elif self.fire_count >= 5 and self.fire_count > self.sun_count:
-                image_path = self.evolved_image_path["flame"]
-            elif self.sun_count >= 5 and self.sun_count > self.fire_count:
-                image_path = self.evolved_image_path["sun"]
+        # 分岐がある場合はアイテムの使用回数で進化形態を決定
+        # （画像は先読み済みのハンドルを使い、ここでは読み込まない）
+        if self.evolution.branches:
+            branch = self.evolution.choose(self.item_counts)
+            if branch is None:
+                image_path = self.evolution.default
             else:
-                # 閾値に達していない場合はベース画像を維持
-                image_path = self.base_image_path
-            
-            # 進化画像を読み込み
-            try:
-                self.evolved_image = AssetLoader.load_image(image_path, (300, 300))
-            except Exception as e:
-                print(f"進化画像の読み込みに失敗しました: {str(e)}")
-                self.evolved_image = self.base_image
+                image_path = branch["image"]
+                if branch.get("message"):
+                    log.info(branch["message"])
+            self.evolved_image = self.evolved_handle(image_path)
                 
-        self.image = self.evolved_image if self.evolved_image else self.base_image
+        self.current_image = self.evolved_image if self.evolved_image else self.base_image
         self.is_animating = True
         self.animation_frame = 0
-        print(f"{self.name}が進化しました！")
-        print(f"新しい姿: {image_path if isinstance(self.evolved_image_path, dict) else self.evolved_image_path}")
+        log.info(f"{self.name}が進化しました！")
+        log.info(f"新しい姿: {self.current_image.path}")
+
+        self.scatter_effect_particles()
+        self.particles.emit(300, self.rect.center)
 
-        # 進化エフェクト用のパーティクル（画面サイズに合わせて調整）
+    def scatter_effect_particles(self):
+        # 進化エフェクト用のパーティクル（基準画面の座標、描くときに画面に合わせる）
         self.effect_particles = [
             (random.randint(50, 750), random.randint(50, 550))  # 画面端を避ける
             for _ in range(50)
         ]
+        self.effect_layer = None
+
+    def snapshot(self):
+        data = {
+            "affection": self.affection,
+            "collected": self.collected,
+            "evolved": self.is_evolved,
+        }
+        if self.is_evolved and self.evolved_image is not None:
+            data["evolved_image"] = self.evolved_image.path
+        if self.item_counts:
+            data["item_counts"] = dict(self.item_counts)
+        return data
+
+    def restore(self, data):
+        """セーブデータから状態を戻す（演出や画像の読み込みはしない）"""
+        self.affection = data.get("affection", 0)
+        self.collected = data.get("collected", False)
+        self.item_counts = dict(data.get("item_counts", {}))
+        if data.get("evolved"):
+            self.is_evolved = True
+            image_path = data.get("evolved_image")
+            if image_path:
+                self.evolved_image = self.evolved_handle(image_path)
+            self.current_image = self.evolved_image if self.evolved_image else self.base_image
+            self.scatter_effect_particles()
         
+
+    def notify(self, event_name):
+        for callback in self.listeners:
+            callback(event_name, self)
+
     def increase_affection(self, amount):
         """親密度を増加させ、進化条件をチェック"""
-        self.affection = min(100, self.affection + amount)
-        if self.affection >= 50 and not self.collected:
+        self.affection = min(self.MAX_AFFECTION, self.affection + amount)
+        self.notify("affection")
+        if self.affection >= self.COLLECT_AFFECTION and not self.collected:
             self.collected = True
+            self.notify("collected")
             
         # 全ケモノ共通の進化条件
-        if not self.is_evolved and self.affection >= 100:
+        if not self.is_evolved and self.affection >= self.EVOLVE_AFFECTION:
             self.evolve()
+            self.notify("evolved")
         
         # アニメーション開始
         self.is_animating = True
@@ -163,6 +1522,7 @@ class Animal:
 
     def update(self):
         """アニメーションの状態を更新"""
+        self.particles.update()
         if self.is_animating:
             self.animation_frame += 1
             if self.animation_frame >= self.animation_duration:
@@ -170,53 +1530,391 @@ class Animal:
                 self.animation_frame = 0
         
     def draw(self, screen):
+        self.apply_layout()
+        self.drawn_rects = []
         # 進化エフェクト
         if hasattr(self, 'effect_particles') and self.is_evolved:
-            for i, (x, y) in enumerate(self.effect_particles):
-                try:
-                    alpha = 255 * (1 - i/len(self.effect_particles))
-                    color = (255, 215, 0, int(alpha))
-                    pygame.draw.circle(screen, color, (x, y), 3)
-                except Exception as e:
-                    print(f"パーティクル描画エラー: {str(e)}")
+            try:
+                if self.effect_layer is None:
+                    self.effect_layer = self.build_effect_layer()
+                self.drawn_rects.append(screen.blit(self.effect_layer, (0, 0)))
+            except Exception as e:
+                log.error(f"パーティクル描画エラー: {str(e)}")
                 
         if self.is_animating:
             # 進化中のアニメーション
             if self.is_evolved:
                 # フェードイン効果
                 alpha = min(255, self.animation_frame * 15)
-                temp_surface = pygame.Surface((self.image.get_width(), self.image.get_height()), pygame.SRCALPHA)
-                temp_surface.blit(self.image, (0, 0))
-                temp_surface.set_alpha(alpha)
-                screen.blit(temp_surface, self.rect)
+                self.drawn_rects.append(screen.blit(self.faded_image(alpha), self.rect))
             else:
-                # 通常の跳ねるアニメーション
-                scale = 1.0 + 0.1 * math.sin(math.pi * self.animation_frame / self.animation_duration)
-                offset_y = -10 * math.sin(math.pi * self.animation_frame / self.animation_duration)
-                
-                scaled_image = pygame.transform.smoothscale(self.image, 
-                    (int(self.rect.width * scale), int(self.rect.height * scale)))
-                new_rect = scaled_image.get_rect(center=(self.rect.centerx, self.rect.centery + offset_y))
-                screen.blit(scaled_image, new_rect)
+                # 通常の跳ねるアニメーション（拡大済みフレームを使い回す）
+                image = self.image
+                if self.bounce_frames is None or self.bounce_frames.image is not image:
+                    self.bounce_frames = BounceFrames(image, self.animation_duration, layout.length(10))
+                self.drawn_rects.append(self.bounce_frames.blit(screen, self.rect.center, self.animation_frame))
         else:
-            screen.blit(self.image, self.rect)
+            self.drawn_rects.append(screen.blit(self.image, self.rect))
+
+        # 進化時に飛び散るパーティクル
+        particle_rect = self.particles.draw(screen)
+        if particle_rect:
+            self.drawn_rects.append(particle_rect)
 
         # 進化メッセージ
         if self.is_evolved and self.animation_frame < 30:
-            text = jp_font_large.render(f"{self.name} evolved!", True, (255, 215, 0))
-            text_rect = text.get_rect(center=(400, 500))
-            screen.blit(text, text_rect)
+            text = text_cache.render(layout.font(48), f"{self.name} evolved!", (255, 215, 0))
+            text_rect = text.get_rect(center=layout.point(400, 500))
+            self.drawn_rects.append(screen.blit(text, text_rect))
         
         # ハートマークを確実に表示するためテキストで表示
-        heart_text = f"♥ {self.affection}/100"  # Unicodeハート記号を使用
-        text = jp_font.render(heart_text, True, (255, 0, 0))
-        text_rect = text.get_rect(center=(400, 100))
-        screen.blit(text, text_rect)
+        heart_text = f"♥ {self.affection}/{self.MAX_AFFECTION}"  # Unicodeハート記号を使用
+        text = text_cache.render(layout.font(36), heart_text, (255, 0, 0))
+        text_rect = text.get_rect(center=layout.point(400, 100))
+        self.drawn_rects.append(screen.blit(text, text_rect))
+
+class SpatialHash:
+    """矩形を格子に登録して、座標から当たっている物をすぐに引ける索引"""
+    def __init__(self, cell_size=64):
+        self.cell_size = cell_size
+        self.cells = {}
+        self.rects = {}  # 物 → 登録した矩形
+
+    def _cells_for(self, rect):
+        size = self.cell_size
+        for cx in range(rect.left // size, (rect.right - 1) // size + 1):
+            for cy in range(rect.top // size, (rect.bottom - 1) // size + 1):
+                yield (cx, cy)
+
+    def insert(self, obj, rect):
+        self.remove(obj)
+        rect = pygame.Rect(rect)
+        self.rects[obj] = rect
+        for cell in self._cells_for(rect):
+            self.cells.setdefault(cell, []).append(obj)
+
+    def remove(self, obj):
+        rect = self.rects.pop(obj, None)
+        if rect is None:
+            return
+        for cell in self._cells_for(rect):
+            self.cells[cell].remove(obj)
+
+    def query(self, pos):
+        """pos に当たっている物を登録順に返す"""
+        cell = (pos[0] // self.cell_size, pos[1] // self.cell_size)
+        return [obj for obj in self.cells.get(cell, ()) if self.rects[obj].collidepoint(pos)]
+
+    def first(self, pos):
+        hits = self.query(pos)
+        return hits[0] if hits else None
+
+class Registry:
+    """ケモノとアイテムの定義（assets/kemono_data.json）と、その索引
+
+    好物はケモノ名 → アイテム名の集合、アイテム名 → ケモノ名の集合の両方を事前に作る。
+    食べ物は favorite_food、おもちゃは favorite_toy と一致したときだけ好物になる。
+    """
+    DATA_PATH = "assets/kemono_data.json"
+
+    def __init__(self, items_data, animals_data, hidden_animals_data):
+        self.items_data = items_data
+        self.animals_data = animals_data
+        self.hidden_animals_data = hidden_animals_data
+        self.item_types = {data["name"]: data["type"] for data in items_data}
+        self.favorites_by_animal = {}
+        self.animals_by_item = {}
+        for data in animals_data + hidden_animals_data:
+            favorites = set()
+            if self.item_types.get(data["food"]) == "food":
+                favorites.add(data["food"])
+            if self.item_types.get(data["toy"]) == "toy":
+                favorites.add(data["toy"])
+            self.favorites_by_animal[data["name"]] = favorites
+            for item_name in favorites:
+                self.animals_by_item.setdefault(item_name, set()).add(data["name"])
+
+    @classmethod
+    def load(cls, path=None):
+        with open(path or cls.DATA_PATH, encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data["items"], data["animals"], data.get("hidden_animals", []))
+
+    @property
+    def base_count(self):
+        return len(self.animals_data)
+
+    def is_favorite(self, animal, item):
+        return item.name in self.favorites_by_animal.get(animal.name, ())
+
+    def create_items(self):
+        created = [
+            Item(data["name"], data["type"], data["image"], data.get("power", 1))
+            for data in self.items_data
+        ]
+        for i, item in enumerate(created):
+            item.design_rect.topleft = (50 + i * 60, 500)
+            item.rect = layout.rect(item.design_rect)
+        return created
+
+    @staticmethod
+    def _create_animal(data):
+        return Animal(
+            name=data["name"],
+            favorite_food=data["food"],
+            favorite_toy=data["toy"],
+            base_image=data["base_image"],
+            evolved_image=data["evolved_image"]
+        )
+
+    def create_animals(self):
+        return [self._create_animal(data) for data in self.animals_data]
+
+    def create_hidden_animals(self):
+        return [self._create_animal(data) for data in self.hidden_animals_data]
+
+class DirtyRectRenderer:
+    """変化した部品の領域だけを pygame.display.update で反映する
+
+    各部品は render_key()（見た目を決める状態）と、直前の draw で描いた範囲
+    drawn_rects を持つ。どの部品の状態も変わっていなければ描画ごと省略する。
+    """
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self._keys = {}
+        self._rects = {}
+        self._changed = []
+        self._pending = []
+        self._full = True
+        self.skipped_frames = 0
+
+    def invalidate(self, rect=None):
+        """部品の状態以外の理由で再描画が必要な領域を登録する（None は全画面）"""
+        if rect is None:
+            self._full = True
+        else:
+            self._pending.append(pygame.Rect(rect))
+
+    def begin_frame(self, widgets):
+        """widgets は {名前: 部品}。このフレームを描画する必要があれば True"""
+        if not self.enabled:
+            return True
+        self._changed = []
+        for slot, widget in widgets.items():
+            key = (id(widget), widget.render_key())
+            if self._keys.get(slot) != key:
+                self._keys[slot] = key
+                self._changed.append(slot)
+        # 表示されなくなった部品の跡を消す
+        for slot in list(self._keys):
+            if slot not in widgets:
+                del self._keys[slot]
+                self._pending.extend(self._rects.pop(slot, []))
+        if self._full or self._changed or self._pending:
+            return True
+        self.skipped_frames += 1
+        return False
+
+    def present(self, widgets):
+        if not self.enabled or self._full:
+            pygame.display.flip()
+        else:
+            rects = list(self._pending)
+            for slot in self._changed:
+                rects.extend(self._rects.get(slot, []))
+                rects.extend(widgets[slot].drawn_rects)
+            pygame.display.update(rects)
+        for slot, widget in widgets.items():
+            self._rects[slot] = list(widget.drawn_rects)
+        self._changed = []
+        self._pending = []
+        self._full = False
+
+class FrameScheduler:
+    """動きがある間は active_fps、止まっている間は idle_fps で描画する
+
+    待機中も入力イベントが来たらすぐに次のフレームへ進む。
+    """
+    def __init__(self, active_fps=60, idle_fps=8, idle_after=0.5):
+        self.active_fps = active_fps
+        self.idle_fps = idle_fps
+        self.idle_after = idle_after  # 最後の入力からこの秒数は active_fps を保つ
+        self.frame_time = 0.0  # 直前のフレーム間隔（秒）
+        self.deadline = 0.0  # 次のフレームを始める時刻（perf_counter）
+        self.active = True
+        self._last_input = time.perf_counter()
+        self._frame_start = time.perf_counter()
+
+    @property
+    def fps(self):
+        return 1.0 / self.frame_time if self.frame_time > 0 else 0.0
+
+    def notify_input(self):
+        self._last_input = time.perf_counter()
+
+    @property
+    def idle_frame_time(self):
+        """止まっている間の1フレームの長さ（秒）"""
+        return 1.0 / self.idle_fps
+
+    def time_left(self):
+        """次のフレームの締め切りまでの残り時間（秒）"""
+        return self.deadline - time.perf_counter()
+
+    async def wait_next_frame(self, animating=False):
+        now = time.perf_counter()
+        self.active = animating or now - self._last_input < self.idle_after
+        target = self._frame_start + 1.0 / (self.active_fps if self.active else self.idle_fps)
+        self.deadline = target
+        if self.active:
+            await asyncio.sleep(max(0.0, target - now))
+        else:
+            # 少しずつ眠りながら入力を待つ
+            poll_interval = 1.0 / self.active_fps
+            while now < target and not pygame.event.peek():
+                await asyncio.sleep(min(poll_interval, target - now))
+                now = time.perf_counter()
+        now = time.perf_counter()
+        self.frame_time = now - self._frame_start
+        self._frame_start = now
+
+class _Region:
+    def __init__(self, rect, handler, buttons, enabled):
+        self.rect = rect
+        self.handler = handler
+        self.buttons = buttons
+        self.enabled = enabled
+
+class EventDispatcher:
+    """入力イベントを登録したハンドラに振り分ける
+
+    ハンドラは画面（"title" / "main"、None ならどの画面でも）ごとに登録する。
+    クリックは画面ごとの SpatialHash で当たり判定するので、部品が増えても
+    1回のクリックで調べるのは同じ格子にある矩形だけになる。矩形は基準画面（Layout）の
+    座標で登録するので、画面サイズが変わっても登録し直さなくてよい。
+    矩形にもキーにも当たらなかったイベントは、種類ごとのハンドラに渡す。
+    """
+    def __init__(self, current_screen):
+        self.current_screen = current_screen  # 今の画面名を返す関数
+        self.regions = {}  # 画面 → SpatialHash
+        self.key_handlers = {}  # (画面, キー) → ハンドラ
+        self.type_handlers = {}  # (画面, イベントの種類) → ハンドラのリスト
+        self.pressed_keys = set()  # 押しっぱなしのキー（KEYUP が来るまで）
+
+    def add_region(self, rect, handler, screen=None, buttons=None, enabled=None):
+        """rect のクリックで handler(event) を呼ぶ。後から登録した矩形ほど手前になる
+
+        buttons はマウスボタンの番号の集合（None ならどれでも）、
+        enabled は押せるときだけ True を返す関数。
+        """
+        region = _Region(pygame.Rect(rect), handler, buttons, enabled)
+        self.regions.setdefault(screen, SpatialHash()).insert(region, region.rect)
+        return region
+
+    def move_region(self, region, rect, screen=None):
+        region.rect = pygame.Rect(rect)
+        self.regions[screen].insert(region, region.rect)
+
+    def remove_region(self, region, screen=None):
+        self.regions[screen].remove(region)
+
+    def on_key(self, key, handler, screen=None):
+        self.key_handlers[(screen, key)] = handler
+
+    def on(self, event_type, handler, screen=None):
+        self.type_handlers.setdefault((screen, event_type), []).append(handler)
+
+    def coalesce(self, events):
+        """同じフレームに来た重複イベントをまとめる
+
+        続けて来た MOUSEMOTION は1つにまとめて rel を足し合わせる（間にクリックなどがあれば
+        まとめない）。VIDEORESIZE は最後の1つだけ残す。
+        キーの押しっぱなしで繰り返し来る KEYDOWN は、フレームをまたいでも KEYUP が来るまで1回にする。
+        """
+        result = []
+        last_index = {}  # まとめるイベントの種類 → result 内の位置
+        pressed = self.pressed_keys
+        for event in events:
+            if event.type == pygame.MOUSEMOTION:
+                previous = result[-1] if result else None
+                if previous is not None and previous.type == pygame.MOUSEMOTION:
+                    rel = getattr(previous, "rel", (0, 0))
+                    moved = getattr(event, "rel", (0, 0))
+                    event = pygame.event.Event(pygame.MOUSEMOTION, pos=event.pos,
+                                               rel=(rel[0] + moved[0], rel[1] + moved[1]),
+                                               buttons=getattr(event, "buttons", (0, 0, 0)))
+                    result.pop()
+            elif event.type == pygame.VIDEORESIZE:
+                index = last_index.get(event.type)
+                if index is not None:
+                    result[index] = None
+                last_index[event.type] = len(result)
+            elif event.type in (pygame.KEYDOWN, pygame.KEYUP):
+                # 画面を作り直した直後などは key の無いキーイベントが来ることがある
+                key = getattr(event, "key", None)
+                if key is None:
+                    pass
+                elif event.type == pygame.KEYUP:
+                    pressed.discard(key)
+                elif key in pressed:
+                    continue
+                else:
+                    pressed.add(key)
+            elif event.type == pygame.WINDOWFOCUSLOST:
+                # フォーカスが外れている間に離されたキーは KEYUP が来ない
+                pressed.clear()
+            result.append(event)
+        return [event for event in result if event is not None]
+
+    def dispatch(self, events):
+        """イベントを振り分ける。1つでもイベントがあれば True を返す"""
+        events = self.coalesce(events)
+        for event in events:
+            self.dispatch_one(event)
+        return bool(events)
+
+    def dispatch_one(self, event):
+        screen = self.current_screen()
+        if event.type == pygame.KEYDOWN:
+            key = getattr(event, "key", None)
+            handler = self.key_handlers.get((screen, key)) or self.key_handlers.get((None, key))
+            if handler is not None:
+                handler(event)
+                return
+        elif event.type == pygame.MOUSEBUTTONDOWN:
+            region = self.region_at(event.pos, event.button, screen)
+            if region is not None:
+                region.handler(event)
+                return
+        for handler in self.type_handlers.get((None, event.type), ()):
+            handler(event)
+        for handler in self.type_handlers.get((screen, event.type), ()):
+            handler(event)
+
+    def region_at(self, pos, button=None, screen=None):
+        """画面の座標 pos で押せるいちばん手前の矩形（今の画面のものを優先）"""
+        pos = layout.to_design(pos)
+        for key in (screen, None):
+            spatial_hash = self.regions.get(key)
+            if spatial_hash is None:
+                continue
+            for region in reversed(spatial_hash.query(pos)):
+                if region.buttons is not None and button not in region.buttons:
+                    continue
+                if region.enabled is None or region.enabled():
+                    return region
+        return None
 
 class TitleScreen:
+    BACKGROUND_PATH = "assets/kemono_star_screen.png"
+    BACKGROUND_SIZE = (800, 600)
+
     def __init__(self):
         self.title_font = None
         self.start_button = pygame.Rect(300, 400, 200, 50)
+        self.progress_bar = pygame.Rect(300, 458, 200, 8)
+        self.loading_progress = 1.0  # 画像の先読みの進み具合
+        self.drawn_rects = [pygame.Rect((0, 0), layout.screen_size)]
         
     def load_assets(self):
         try:
@@ -227,62 +1925,144 @@ class TitleScreen:
             except:
                 self.title_font = pygame.font.SysFont(None, 48)  # 最終的な代替
     
+    def render_key(self):
+        return round(self.loading_progress, 2)  # 読み込みが終わればタイトル画面は静的
+    
     def draw(self, screen):
+        # 背景は画面サイズごとに一度だけ縮小される（ImageCache に残る）
         try:
-            bg_image = AssetLoader.load_image("assets/kemono_star_screen.png", (800, 600))
-            screen.blit(bg_image, (0, 0))
+            bg_image = AssetLoader.load_image(self.BACKGROUND_PATH, layout.size(*self.BACKGROUND_SIZE))
+            screen.blit(bg_image, layout.point(0, 0))
         except:
             screen.fill((135, 206, 235))
         
-        pygame.draw.rect(screen, (50, 150, 50), self.start_button, border_radius=10)
+        pygame.draw.rect(screen, (50, 150, 50), layout.rect(self.start_button), border_radius=layout.length(10))
         try:
-            button_font = jp_font_small
-            start_text = button_font.render("START GAME", True, (255, 255, 255))
-            screen.blit(start_text, (400 - start_text.get_width()//2, 415))
+            button_font = layout.font(24)
+            start_text = text_cache.render(button_font, "START GAME", (255, 255, 255))
+            screen.blit(start_text, layout.centered(start_text, 400, 415))
         except:
             try:
-                button_font = pygame.font.SysFont("sans-serif", 28)  # 代替フォント1
+                button_font = pygame.font.SysFont("sans-serif", layout.length(28))  # 代替フォント1
                 start_text = button_font.render("ゲームスタート", True, (255, 255, 255))
-                screen.blit(start_text, (400 - start_text.get_width()//2, 415))
+                screen.blit(start_text, layout.centered(start_text, 400, 415))
             except:
-                button_font = pygame.font.SysFont(None, 28)  # 最終的な代替
+                button_font = pygame.font.SysFont(None, layout.length(28))  # 最終的な代替
                 start_text = button_font.render("ゲームスタート", True, (255, 255, 255))
-                screen.blit(start_text, (400 - start_text.get_width()//2, 415))
+                screen.blit(start_text, layout.centered(start_text, 400, 415))
+        
+        # 画像の読み込み中は進み具合を表示する
+        if self.loading_progress < 1.0:
+            bar = layout.rect(self.progress_bar)
+            pygame.draw.rect(screen, (220, 220, 220), bar, border_radius=layout.length(4))
+            filled = bar.copy()
+            filled.width = int(filled.width * self.loading_progress)
+            pygame.draw.rect(screen, (50, 150, 50), filled, border_radius=layout.length(4))
+        self.drawn_rects = [screen.get_rect()]
     
-    def handle_event(self, event, game_state):
-        if event.type == pygame.MOUSEBUTTONDOWN:
-            if self.start_button.collidepoint(event.pos):
-                game_state.current_screen = "main"
-                return True
-        return False
+    def register_handlers(self, dispatcher, game_state):
+        def start(event):
+            game_state.current_screen = "main"
+        dispatcher.add_region(self.start_button, start, screen="title")
+
+class ThumbnailAtlas:
+    """サムネイルを1枚のSurfaceに並べてまとめたもの
+
+    画像パスごとに一度だけ縮小して書き込み、足りなくなったら行を増やす。
+    """
+    def __init__(self, cell_size=(120, 120), columns=8):
+        self.cell_size = cell_size
+        self.columns = columns
+        self.surface = None
+        self.slots = {}  # 画像パス → atlas上の範囲
+
+    def _grow(self, rows):
+        width = self.cell_size[0] * self.columns
+        surface = pygame.Surface((width, self.cell_size[1] * rows), pygame.SRCALPHA)
+        profiler.count("surfaces")
+        if self.surface is not None:
+            surface.blit(self.surface, (0, 0))
+        self.surface = surface
+
+    def add(self, path):
+        area = self.slots.get(path)
+        if area is not None:
+            return area
+        index = len(self.slots)
+        rows_needed = index // self.columns + 1
+        if self.surface is None or self.surface.get_height() < rows_needed * self.cell_size[1]:
+            # 作り直しを減らすため行数は倍々で増やす
+            current_rows = self.surface.get_height() // self.cell_size[1] if self.surface else 1
+            self._grow(max(rows_needed, current_rows * 2))
+        area = pygame.Rect((index % self.columns) * self.cell_size[0],
+                           (index // self.columns) * self.cell_size[1],
+                           *self.cell_size)
+        self.surface.blit(AssetLoader.load_image(path, self.cell_size), area)
+        self.slots[path] = area
+        return area
+
+    def blit(self, screen, path, pos):
+        return screen.blit(self.surface, pos, self.add(path))
 
 class CollectionScreen:
+    THUMBNAIL_SIZE = (120, 120)
+    PREV_BUTTON = pygame.Rect(300, 480, 50, 30)
+    NEXT_BUTTON = pygame.Rect(450, 480, 50, 30)
+
     def __init__(self, animals):
         self.visible = False
         self.animals = animals
         self.current_page = 0
         self.items_per_page = 8
+        self.drawn_rects = []
+        self.atlas = ThumbnailAtlas(layout.size(*self.THUMBNAIL_SIZE))
+        self.page_surface = None
+        self.page_key = None
+        
+    def render_key(self):
+        return (self.visible, self.current_page, len(self.animals))
+        
+    @property
+    def total_pages(self):
+        return (len(self.animals) + self.items_per_page - 1) // self.items_per_page
         
     def draw(self, screen):
         if not self.visible:
+            self.drawn_rects = []
             return
-            
-        overlay = pygame.Surface((800, 600), pygame.SRCALPHA)
-        overlay.fill((0, 0, 0, 200))
-        screen.blit(overlay, (0, 0))
+        # ページの内容はページ番号・ケモノの数・画面サイズが変わったときだけ作り直す
+        page_key = (self.current_page, len(self.animals), layout.version)
+        if self.page_surface is None or self.page_key != page_key:
+            self.page_surface = self.compose_page()
+            self.page_key = page_key
+        self.drawn_rects = [screen.blit(self.page_surface, (0, 0))]
         
-        pygame.draw.rect(screen, (255, 255, 255), (50, 50, 700, 500), border_radius=10)
+    def compose_page(self):
+        """現在のページを画面サイズの1枚のSurfaceに描く"""
+        # サムネイルは画面サイズが変わったときだけ縮小し直す
+        thumbnail_size = layout.size(*self.THUMBNAIL_SIZE)
+        if self.atlas.cell_size != thumbnail_size:
+            self.atlas = ThumbnailAtlas(thumbnail_size)
+        # 増えたケモノ（隠しケモノなど）の分だけatlasに追加する
+        for animal in self.animals:
+            self.atlas.add(animal.base_image_path)
+        
+        screen = pygame.Surface(layout.screen_size, pygame.SRCALPHA)
+        profiler.count("surfaces")
+        screen.fill((0, 0, 0, 200))
+        
+        pygame.draw.rect(screen, (255, 255, 255), layout.rect((50, 50, 700, 500)), border_radius=layout.length(10))
         
         try:
-            title = jp_font_large.render("Kemono Collection", True, (0, 0, 0))
-            screen.blit(title, (400 - title.get_width()//2, 70))
+            title = text_cache.render(layout.font(48), "Kemono Collection", (0, 0, 0))
+            screen.blit(title, layout.centered(title, 400, 70))
         except Exception as e:
-            print(f"フォント描画エラー: {e}")
-            font = pygame.font.SysFont(None, 40)
+            log.error(f"フォント描画エラー: {e}")
+            font = pygame.font.SysFont(None, layout.length(40))
             title = font.render("あなたのケモノコレクション", True, (0, 0, 0))
-            screen.blit(title, (400 - title.get_width()//2, 70))
+            screen.blit(title, layout.centered(title, 400, 70))
         
-        total_pages = (len(self.animals) + self.items_per_page - 1) // self.items_per_page
+        total_pages = self.total_pages
         start_index = self.current_page * self.items_per_page
         end_index = min(start_index + self.items_per_page, len(self.animals))
         
@@ -297,300 +2077,575 @@ class CollectionScreen:
             y = start_y + row * 180
             
             # ベース画像のパスを使用
-            thumbnail = AssetLoader.load_image(animal.base_image_path, (120, 120))
-            screen.blit(thumbnail, (x, y))
+            self.atlas.blit(screen, animal.base_image_path, layout.point(x, y))
             
             try:
-                name_text = jp_font_small.render(animal.name, True, (0, 0, 0))
-                screen.blit(name_text, (x + 60 - name_text.get_width()//2, y + 130))
+                name_text = text_cache.render(layout.font(24), animal.name, (0, 0, 0))
+                screen.blit(name_text, layout.centered(name_text, x + 60, y + 130))
             except Exception as e:
-                print(f"フォント描画エラー: {e}")
-                font = pygame.font.SysFont(None, 14)
+                log.error(f"フォント描画エラー: {e}")
+                font = pygame.font.SysFont(None, layout.length(14))
                 name_text = font.render(animal.name, True, (0, 0, 0))
-                screen.blit(name_text, (x + 60 - name_text.get_width()//2, y + 130))
+                screen.blit(name_text, layout.centered(name_text, x + 60, y + 130))
         
         if total_pages > 1:
             try:
-                font = jp_font_small
+                font = layout.font(24)
                 if self.current_page > 0:
-                    pygame.draw.rect(screen, (100, 100, 100), (300, 480, 50, 30), border_radius=5)
-                    prev_text = font.render("<", True, (255, 255, 255))
-                    screen.blit(prev_text, (325 - prev_text.get_width()//2, 485))
+                    pygame.draw.rect(screen, (100, 100, 100), layout.rect(self.PREV_BUTTON), border_radius=layout.length(5))
+                    prev_text = text_cache.render(font, "<", (255, 255, 255))
+                    screen.blit(prev_text, layout.centered(prev_text, 325, 485))
                 
-                page_text = font.render(f"{self.current_page+1}/{total_pages}", True, (0, 0, 0))
-                screen.blit(page_text, (400 - page_text.get_width()//2, 485))
+                page_text = text_cache.render(font, f"{self.current_page+1}/{total_pages}", (0, 0, 0))
+                screen.blit(page_text, layout.centered(page_text, 400, 485))
                 
                 if self.current_page < total_pages - 1:
-                    pygame.draw.rect(screen, (100, 100, 100), (450, 480, 50, 30), border_radius=5)
-                    next_text = font.render(">", True, (255, 255, 255))
-                    screen.blit(next_text, (475 - next_text.get_width()//2, 485))
+                    pygame.draw.rect(screen, (100, 100, 100), layout.rect(self.NEXT_BUTTON), border_radius=layout.length(5))
+                    next_text = text_cache.render(font, ">", (255, 255, 255))
+                    screen.blit(next_text, layout.centered(next_text, 475, 485))
             except:
                 try:
-                    font = pygame.font.SysFont("sans-serif", 28)  # 代替フォント1
+                    font = pygame.font.SysFont("sans-serif", layout.length(28))  # 代替フォント1
                     if self.current_page > 0:
-                        pygame.draw.rect(screen, (100, 100, 100), (300, 480, 50, 30), border_radius=5)
+                        pygame.draw.rect(screen, (100, 100, 100), layout.rect(self.PREV_BUTTON), border_radius=layout.length(5))
                         prev_text = font.render("前", True, (255, 255, 255))
-                        screen.blit(prev_text, (325 - prev_text.get_width()//2, 485))
+                        screen.blit(prev_text, layout.centered(prev_text, 325, 485))
                     
                     page_text = font.render(f"{self.current_page+1}/{total_pages}", True, (0, 0, 0))
-                    screen.blit(page_text, (400 - page_text.get_width()//2, 485))
+                    screen.blit(page_text, layout.centered(page_text, 400, 485))
                     
                     if self.current_page < total_pages - 1:
-                        pygame.draw.rect(screen, (100, 100, 100), (450, 480, 50, 30), border_radius=5)
+                        pygame.draw.rect(screen, (100, 100, 100), layout.rect(self.NEXT_BUTTON), border_radius=layout.length(5))
                         next_text = font.render("次", True, (255, 255, 255))
-                        screen.blit(next_text, (475 - next_text.get_width()//2, 485))
+                        screen.blit(next_text, layout.centered(next_text, 475, 485))
                 except:
-                    font = pygame.font.SysFont(None, 28)  # 最終的な代替
+                    font = pygame.font.SysFont(None, layout.length(28))  # 最終的な代替
                     if self.current_page > 0:
-                        pygame.draw.rect(screen, (100, 100, 100), (300, 480, 50, 30), border_radius=5)
+                        pygame.draw.rect(screen, (100, 100, 100), layout.rect(self.PREV_BUTTON), border_radius=layout.length(5))
                         prev_text = font.render("前", True, (255, 255, 255))
-                        screen.blit(prev_text, (325 - prev_text.get_width()//2, 485))
+                        screen.blit(prev_text, layout.centered(prev_text, 325, 485))
                     
                     page_text = font.render(f"{self.current_page+1}/{total_pages}", True, (0, 0, 0))
-                    screen.blit(page_text, (400 - page_text.get_width()//2, 485))
+                    screen.blit(page_text, layout.centered(page_text, 400, 485))
                     
                     if self.current_page < total_pages - 1:
-                        pygame.draw.rect(screen, (100, 100, 100), (450, 480, 50, 30), border_radius=5)
+                        pygame.draw.rect(screen, (100, 100, 100), layout.rect(self.NEXT_BUTTON), border_radius=layout.length(5))
                         next_text = font.render("次", True, (255, 255, 255))
-                        screen.blit(next_text, (475 - next_text.get_width()//2, 485))
+                        screen.blit(next_text, layout.centered(next_text, 475, 485))
+        
+        return screen
     
-    def handle_event(self, event):
-        if event.type == pygame.KEYDOWN:
-            if event.key == pygame.K_c:
-                self.visible = not self.visible
-                return True
-            elif event.key == pygame.K_RIGHT:
-                total_pages = (len(self.animals) + self.items_per_page - 1) // self.items_per_page
-                if self.current_page < total_pages - 1:
-                    self.current_page += 1
-                    return True
-            elif event.key == pygame.K_LEFT:
-                if self.current_page > 0:
-                    self.current_page -= 1
-                    return True
+    def toggle(self, event=None):
+        self.visible = not self.visible
         
-        elif event.type == pygame.MOUSEBUTTONDOWN and self.visible:
-            if 300 <= event.pos[0] <= 350 and 480 <= event.pos[1] <= 510 and self.current_page > 0:
-                self.current_page -= 1
-                return True
-            elif 450 <= event.pos[0] <= 500 and 480 <= event.pos[1] <= 510 and self.current_page < (len(self.animals) + self.items_per_page - 1) // self.items_per_page - 1:
-                self.current_page += 1
-                return True
-                
-        return False
+    def previous_page(self, event=None):
+        if self.current_page > 0:
+            self.current_page -= 1
+        
+    def next_page(self, event=None):
+        if self.current_page < self.total_pages - 1:
+            self.current_page += 1
+        
+    def register_handlers(self, dispatcher):
+        dispatcher.on_key(pygame.K_c, self.toggle, screen="main")
+        dispatcher.on_key(pygame.K_RIGHT, self.next_page, screen="main")
+        dispatcher.on_key(pygame.K_LEFT, self.previous_page, screen="main")
+        # ページ送りボタンは表示中で、めくれるときだけ押せる
+        dispatcher.add_region(self.PREV_BUTTON, self.previous_page, screen="main",
+                              enabled=lambda: self.visible and self.current_page > 0)
+        dispatcher.add_region(self.NEXT_BUTTON, self.next_page, screen="main",
+                              enabled=lambda: self.visible and self.current_page < self.total_pages - 1)
+
+class Habitat:
+    """コレクションしたケモノをまとめて放し飼いにする広場
+
+    住人の位置・速度・跳ねる位相は ParticleSystem と同じく平たい配列で持つ。
+    描画では画面に入る住人だけを選び（カリング）、ズームに合った縮小済み画像（LOD）を
+    Surface.blits で1回にまとめて描くので、住人ごとの拡大縮小やdraw呼び出しが無い。
+    広場は画面全体に描き、画面サイズが変わったら LOD の画像を作り直す。
+    """
+    FIELD_SIZE = (2400, 1800)
+    ZOOMS = (1.0, 0.5, 0.25)
+    LOD_SIZES = (128, 64, 32)  # ズームごとの住人の画像の大きさ（基準画面での大きさ）
+    RESIDENTS_PER_ANIMAL = 1  # 1種類のケモノから何匹出すか（ベンチマークで増やす）
+    SPEED = 1.5
+    TURN_CHANCE = 1 / 120  # 1フレームで向きを変える確率
+    BOUNCE_HEIGHT = 12
+    BACKGROUND_COLOR = (170, 215, 140)
+
+    def __init__(self):
+        self.camera = [0.0, 0.0]  # 表示範囲の左上（広場の座標）
+        self.zoom_level = 0
+        self.roster = []  # 住人の種類（ケモノ）
+        self.roster_key = None
+        self.count = 0
+        self.kind = self.x = self.y = self.vx = self.vy = self.phase = None
+        self.sprites = {}  # 画像パス → LODごとの縮小済み画像
+        self.sprites_version = layout.version
+        self.frame = 0
+        self.visible_count = 0
+        self.drawn_rects = []
+        self.drag_start = None
+
+    @property
+    def view_size(self):
+        return layout.screen_size
+
+    @property
+    def zoom(self):
+        """広場の1単位が画面の何画素になるか"""
+        return self.ZOOMS[self.zoom_level] * layout.scale
+
+    @property
+    def sprite_size(self):
+        return layout.length(self.LOD_SIZES[self.zoom_level])
+
+    def render_key(self):
+        return (self.frame, self.zoom_level, tuple(self.camera), self.roster_key)
+
+    def sync(self, animals):
+        """コレクション済みのケモノが変わったら住人を作り直す"""
+        key = tuple(id(animal) for animal in animals)
+        if key == self.roster_key:
+            return
+        self.roster_key = key
+        self.roster = list(animals)
+        self.count = len(self.roster) * self.RESIDENTS_PER_ANIMAL
+        kinds = [i for i in range(len(self.roster)) for _ in range(self.RESIDENTS_PER_ANIMAL)]
+        width, height = self.FIELD_SIZE
+        if np is not None:
+            self.kind = np.array(kinds, np.int32)
+            self.x = np.random.uniform(0, width, self.count).astype(np.float32)
+            self.y = np.random.uniform(0, height, self.count).astype(np.float32)
+            self.phase = np.random.uniform(0, math.pi, self.count).astype(np.float32)
+            self.vx = np.zeros(self.count, np.float32)
+            self.vy = np.zeros(self.count, np.float32)
+            self._turn(np.ones(self.count, bool))
+        else:
+            self.kind = kinds
+            self.x = [random.uniform(0, width) for _ in kinds]
+            self.y = [random.uniform(0, height) for _ in kinds]
+            self.phase = [random.uniform(0, math.pi) for _ in kinds]
+            self.vx = [0.0] * self.count
+            self.vy = [0.0] * self.count
+            for i in range(self.count):
+                self._turn_one(i)
+
+    def _turn(self, mask):
+        n = int(mask.sum())
+        angle = np.random.uniform(0, 2 * math.pi, n)
+        speed = np.random.uniform(0.3, 1.0, n) * self.SPEED
+        self.vx[mask] = np.cos(angle) * speed
+        self.vy[mask] = np.sin(angle) * speed
+
+    def _turn_one(self, i):
+        angle = random.uniform(0, 2 * math.pi)
+        speed = random.uniform(0.3, 1.0) * self.SPEED
+        self.vx[i] = math.cos(angle) * speed
+        self.vy[i] = math.sin(angle) * speed
+
+    def update(self):
+        self.frame += 1
+        if self.count == 0:
+            return
+        width, height = self.FIELD_SIZE
+        if np is not None:
+            self._turn(np.random.random(self.count) < self.TURN_CHANCE)
+            self.x += self.vx
+            self.y += self.vy
+            # 広場の端で跳ね返る
+            outside_x = (self.x < 0) | (self.x > width)
+            outside_y = (self.y < 0) | (self.y > height)
+            self.vx[outside_x] *= -1
+            self.vy[outside_y] *= -1
+            np.clip(self.x, 0, width, out=self.x)
+            np.clip(self.y, 0, height, out=self.y)
+            self.phase += 0.15
+        else:
+            for i in range(self.count):
+                if random.random() < self.TURN_CHANCE:
+                    self._turn_one(i)
+                x = self.x[i] + self.vx[i]
+                y = self.y[i] + self.vy[i]
+                if not 0 <= x <= width:
+                    self.vx[i] *= -1
+                if not 0 <= y <= height:
+                    self.vy[i] *= -1
+                self.x[i] = min(max(x, 0), width)
+                self.y[i] = min(max(y, 0), height)
+                self.phase[i] += 0.15
+
+    def sprite(self, animal, lod):
+        """ケモノの今の姿を LOD の大きさに縮小した画像（画像ごとに一度だけ作る）"""
+        if self.sprites_version != layout.version:
+            self.sprites = {}
+            self.sprites_version = layout.version
+        handle = animal.current_image
+        sprites = self.sprites.get(handle.path)
+        if sprites is None:
+            sprites = []
+            image = handle.get()
+            # 大きいものから順に縮小していく
+            for size in self.LOD_SIZES:
+                size = layout.length(size)
+                image = pygame.transform.smoothscale(image, (size, size))
+                profiler.count("surfaces")
+                sprites.append(image)
+            self.sprites[handle.path] = sprites
+        return sprites[lod]
+
+    def screen_positions(self):
+        """住人の画像の左上の画面座標（足元が住人の位置、跳ねる分だけ上にずれる）"""
+        zoom = self.zoom
+        size = self.sprite_size
+        if np is not None:
+            bounce = np.abs(np.sin(self.phase)) * self.BOUNCE_HEIGHT
+            sx = (self.x - self.camera[0]) * zoom - size / 2
+            sy = (self.y - bounce - self.camera[1]) * zoom - size
+            return sx, sy
+        sx = [(x - self.camera[0]) * zoom - size / 2 for x in self.x]
+        sy = [(y - abs(math.sin(phase)) * self.BOUNCE_HEIGHT - self.camera[1]) * zoom - size
+              for y, phase in zip(self.y, self.phase)]
+        return sx, sy
+
+    def visible_residents(self, sx, sy):
+        """画面に入る住人の番号（奥から手前の順）"""
+        size = self.sprite_size
+        width, height = self.view_size
+        if np is not None:
+            inside = (sx > -size) & (sx < width) & (sy > -size) & (sy < height)
+            indices = np.nonzero(inside)[0]
+            return indices[np.argsort(self.y[indices], kind="stable")]
+        indices = [i for i in range(self.count) if -size < sx[i] < width and -size < sy[i] < height]
+        return sorted(indices, key=lambda i: self.y[i])
+
+    def draw(self, screen):
+        screen.fill(self.BACKGROUND_COLOR)
+        self.clamp_camera()  # 画面サイズが変わると見える範囲も変わる
+        zoom = self.zoom
+        field = pygame.Rect(-self.camera[0] * zoom, -self.camera[1] * zoom,
+                            self.FIELD_SIZE[0] * zoom, self.FIELD_SIZE[1] * zoom)
+        pygame.draw.rect(screen, (120, 170, 100), field, layout.length(4))
+        if self.count:
+            sx, sy = self.screen_positions()
+            visible = self.visible_residents(sx, sy)
+            kind_sprites = [self.sprite(animal, self.zoom_level) for animal in self.roster]
+            kind = self.kind
+            # 画面に入る住人をまとめて1回で描く
+            screen.blits([(kind_sprites[kind[i]], (int(sx[i]), int(sy[i]))) for i in visible], False)
+            self.visible_count = len(visible)
+        else:
+            self.visible_count = 0
+        try:
+            if self.roster:
+                text = f"ひろば {self.visible_count}/{self.count}匹（H: もどる / ドラッグ: 移動 / ホイール: ズーム）"
+            else:
+                text = "まだケモノがいません（H: もどる）"
+            label = text_cache.render(layout.font(24), text, (40, 60, 40))
+            screen.blit(label, (layout.length(10), layout.length(10)))
+        except Exception as e:
+            log.error(f"フォント描画エラー: {e}")
+        self.drawn_rects = [screen.get_rect()]
+
+    def view_center(self):
+        return (self.view_size[0] // 2, self.view_size[1] // 2)
+
+    def clamp_camera(self):
+        zoom = self.zoom
+        for axis in (0, 1):
+            limit = max(0.0, self.FIELD_SIZE[axis] - self.view_size[axis] / zoom)
+            self.camera[axis] = min(max(self.camera[axis], 0.0), limit)
+
+    def pan(self, dx, dy):
+        """画面上で (dx, dy) だけ動かす"""
+        self.camera[0] += dx / self.zoom
+        self.camera[1] += dy / self.zoom
+        self.clamp_camera()
+
+    def zoom_at(self, pos, step):
+        """pos の下の地点を動かさずにズームを1段階変える（step: +1 で寄る）"""
+        level = min(max(self.zoom_level - step, 0), len(self.ZOOMS) - 1)
+        if level == self.zoom_level:
+            return
+        world_x = self.camera[0] + pos[0] / self.zoom
+        world_y = self.camera[1] + pos[1] / self.zoom
+        self.zoom_level = level
+        self.camera = [world_x - pos[0] / self.zoom, world_y - pos[1] / self.zoom]
+        self.clamp_camera()
+
+    def resident_at(self, pos):
+        """pos に描かれているいちばん手前の住人のケモノ"""
+        if self.count == 0:
+            return None
+        size = self.sprite_size
+        sx, sy = self.screen_positions()
+        hits = [i for i in self.visible_residents(sx, sy)
+                if sx[i] <= pos[0] < sx[i] + size and sy[i] <= pos[1] < sy[i] + size]
+        return self.roster[self.kind[hits[-1]]] if hits else None
+
+    def register_handlers(self, dispatcher, open_animal):
+        """ドラッグで移動、ホイールでズーム、クリックした住人を open_animal(ケモノ) で開く"""
+        def on_button_down(event):
+            if event.button == 1:
+                self.drag_start = event.pos
+
+        def on_button_up(event):
+            if event.button != 1 or self.drag_start is None:
+                return
+            moved = abs(event.pos[0] - self.drag_start[0]) + abs(event.pos[1] - self.drag_start[1])
+            self.drag_start = None
+            if moved < 6:
+                animal = self.resident_at(event.pos)
+                if animal is not None:
+                    open_animal(animal)
+
+        def on_motion(event):
+            if self.drag_start is not None and getattr(event, "buttons", (0,))[0]:
+                rel = getattr(event, "rel", (0, 0))
+                self.pan(-rel[0], -rel[1])
+
+        def on_wheel(event):
+            self.zoom_at(pygame.mouse.get_pos(), 1 if event.y > 0 else -1)
+
+        dispatcher.on(pygame.MOUSEBUTTONDOWN, on_button_down, screen="habitat")
+        dispatcher.on(pygame.MOUSEBUTTONUP, on_button_up, screen="habitat")
+        dispatcher.on(pygame.MOUSEMOTION, on_motion, screen="habitat")
+        dispatcher.on(pygame.MOUSEWHEEL, on_wheel, screen="habitat")
+        for key, (dx, dy) in {pygame.K_LEFT: (-200, 0), pygame.K_RIGHT: (200, 0),
+                              pygame.K_UP: (0, -200), pygame.K_DOWN: (0, 200)}.items():
+            dispatcher.on_key(key, lambda event, dx=dx, dy=dy: self.pan(dx * layout.scale, dy * layout.scale),
+                              screen="habitat")
+        dispatcher.on_key(pygame.K_EQUALS, lambda event: self.zoom_at(self.view_center(), 1), screen="habitat")
+        dispatcher.on_key(pygame.K_MINUS, lambda event: self.zoom_at(self.view_center(), -1), screen="habitat")
 
 async def main():
     pygame.init()
-    screen = pygame.display.set_mode((800, 600))
-    print("Pygame初期化完了")  # デバッグ用出力
+    screen = pygame.display.set_mode(SCREEN_SIZE, pygame.RESIZABLE)
+    layout.resize(screen.get_size())
+    log.debug("Pygame初期化完了")
     pygame.display.set_caption("Kemono Collection")
-    clock = pygame.time.Clock()
+    scheduler = FrameScheduler()
     
     game_state = GameState()
     
     pygame.mixer.init()
     
-    try:
-        bgm_path = "assets/bgm_main.ogg"
-        pygame.mixer.music.load(bgm_path)
-        pygame.mixer.music.set_volume(0.2)  # 音量を20%に設定
-        pygame.mixer.music.play(-1)
-        print(f"BGM再生: {bgm_path} (音量: 0.2)")
-    except Exception as e:
-        print(f"警告: BGMの読み込みに失敗しました: {str(e)}")
+    audio = AudioManager()
+    audio.init_channels()
+    audio.load("food", "assets/food.wav", "item")
+    audio.load("toy", "assets/toy.wav", "item")
+    audio.load("happy", "assets/happy.wav", "reward")
+    audio.load("switch", "assets/switch.wav", "ui")
+    bgm_task = None  # BGMは最初のフレームを出してから読み込む
     
-    sounds = {
-        "food": AssetLoader.load_sound("assets/food.wav"),
-        "toy": AssetLoader.load_sound("assets/toy.wav"),
-        "happy": AssetLoader.load_sound("assets/happy.wav"),
-        "switch": AssetLoader.load_sound("assets/switch.wav")
-    }
+    registry = Registry.load()
+    items = registry.create_items()
+    game_state.add_animals(registry.create_animals())
+    game_state.add_animals(registry.create_hidden_animals(), hidden=True)
     
-    items = [
-        Item("Fish", "food", "assets/fish.png", 5),
-        Item("Meat", "food", "assets/meat.png", 5),
-        Item("Carrot", "food", "assets/carrot.png", 5),
-        Item("Ball", "toy", "assets/ball.png", 5),
-        Item("Bone", "toy", "assets/bone.png", 5),
-        Item("Sword", "toy", "assets/sword.png", 5),
-        Item("Rainbow", "food", "assets/rainbow.png", 5),
-        Item("Fire", "food", "assets/flame.png", 5),
-        Item("Star", "toy", "assets/star.png", 5),
-        Item("Sun", "toy", "assets/sun.png", 5)
-    ]
+    title_screen = TitleScreen()
+    title_screen.load_assets()
+    collection_screen = CollectionScreen(game_state.animals)
+    habitat = Habitat()
     
-    base_animal_data = [
-        {
-            "name": "Cat",
-            "food": "Fish",
-            "toy": "Ball",
-            "base_image": "assets/cat_2.png",
-            "evolved_image": "assets/universe.PNG"
-        },
-        {
-            "name": "Rabbit",
-            "food": "Carrot",
-            "toy": "Carrot",
-            "base_image": "assets/rabbit_2.png",
-            "evolved_image": "assets/king.png"  # ウサギ進化後
-        },
-        {
-            "name": "Dog",
-            "food": "Meat",
-            "toy": "Bone",
-            "base_image": "assets/dog_2.png",
-            "evolved_image": "assets/streetStyle.png"  # イヌ進化後
-        },
-        {
-            "name": "Fox",
-            "food": "Grape",
-            "toy": "Ball",
-            "base_image": "assets/fox_2.png",
-            "evolved_image": "assets/casualStyle.png"  # 進化後画像を更新
-        },
-        {
-            "name": "Tiger",
-            "food": "Meat",
-            "toy": "Ball",
-            "base_image": "assets/tiger_2.png",
-            "evolved_image": "assets/steamPunk.png"
-        },
-        {
-            "name": "Dragon",
-            "food": "Gem",
-            "toy": "Sword",
-            "base_image": "assets/dragon_2.png",
-            "evolved_image": "assets/Medievalfantasystyle.png"
-        },
-        {
-            "name": "Wolf",
-            "food": "Meat",
-            "toy": "Bone",
-            "base_image": "assets/wolf_2.png",
-            "evolved_image": "assets/wizard.png"  # ウィザードオオカミに変更
-        }
-    ]
+    # タイトル表示中にケモノ画像を先読みしておく
+    renderer = DirtyRectRenderer(enabled=DIRTY_RECT_RENDERING)
+    autosaver = Autosaver(game_state, SaveStore())
+    if autosaver.load():
+        log.info("セーブデータから再開します")
+    for event_name in ("affection", "collected", "evolved", "hidden_unlocked", "item_used"):
+        game_state.on(event_name, autosaver.mark_dirty)
+    autosave_task = asyncio.create_task(autosaver.run())
     
-    hidden_animals_data = [
-        {
-            "name": "Unicorn",
-            "food": "Rainbow",
-            "toy": "Star",
-            "base_image": "assets/unicorn_2.png",
-            "evolved_image": "assets/mage.png"
-        },
-        {
-            "name": "Phoenix",
-            "food": "Fire",
-            "toy": "Sun",
-            "base_image": "assets/phoenix_2.png",
-            "evolved_image": "assets/afterPhoenix.png"
-        }
-    ]
+    prefetcher = ImagePrefetcher(scheduler)
+    prefetch_task = asyncio.create_task(prefetcher.run())
+    game_state.prefetch_neighbors(prefetcher)
+    prefetcher.request([item.image_handle for item in items], ImagePrefetcher.PRIORITY_ITEMS)
     
-    for data in base_animal_data:
-        animal = Animal(
-            name=data["name"],
-            favorite_food=data["food"],
-            favorite_toy=data["toy"],
-            base_image=data["base_image"],
-            evolved_image=data["evolved_image"]
-        )
-        game_state.animals.append(animal)
+    def on_hidden_unlocked(hidden_animals):
+        game_state.prefetch_neighbors(prefetcher)
+        log.info("隠しケモノが解放されました！")
+        audio.play("happy")
     
-    for data in hidden_animals_data:
-        animal = Animal(
-            name=data["name"],
-            favorite_food=data["food"],
-            favorite_toy=data["toy"],
-            base_image=data["base_image"],
-            evolved_image=data["evolved_image"]
-        )
-        game_state.hidden_animals.append(animal)
+    game_state.on("hidden_unlocked", on_hidden_unlocked)
     
-    title_screen = TitleScreen()
-    title_screen.load_assets()
-    collection_screen = CollectionScreen(game_state.animals)
+    def on_affection(animal):
+        # 進化が近づいたら、進化先の候補をすべて先読みしておく
+        if not animal.is_evolved and animal.affection >= Animal.PREFETCH_AFFECTION:
+            prefetcher.request(animal.candidate_evolved_images(), ImagePrefetcher.PRIORITY_CURRENT)
     
+    game_state.on("affection", on_affection)
+    
+    dispatcher = EventDispatcher(lambda: game_state.current_screen)
     running = True
+    
+    def on_quit(event):
+        nonlocal running
+        running = False
+    
+    def on_toggle_profiler(event):
+        profiler.toggle_overlay()
+        renderer.invalidate()
+    
+    pending_resize = None  # (新しい大きさ, 最後に大きさが変わった時刻)
+    
+    def on_resize(event):
+        # ドラッグ中は今の配置のまま描き、止まってから apply_pending_resize で作り直す
+        nonlocal screen, pending_resize
+        screen = pygame.display.get_surface()
+        size = screen.get_size()
+        if size[0] > 0 and size[1] > 0:
+            pending_resize = (size, time.perf_counter())
+        renderer.invalidate()
+    
+    def apply_pending_resize():
+        # 配置と縮小済みの画像は次に描くときに各部品が作り直す
+        nonlocal pending_resize
+        if pending_resize is None or time.perf_counter() - pending_resize[1] < RESIZE_SETTLE_SECONDS:
+            return
+        size, _ = pending_resize
+        pending_resize = None
+        if layout.resize(size):
+            renderer.invalidate()
+            # 手元の画像を拡大しただけの仮の画像は、空き時間に元画像から読み直す
+            # （先に新しい大きさを伝えておかないと、古い大きさの読み込み済みとして飛ばされる）
+            for animal in game_state.neighbor_animals():
+                animal.apply_layout()
+            for item in items:
+                item.apply_layout()
+            game_state.prefetch_neighbors(prefetcher)
+            prefetcher.request([item.image_handle for item in items], ImagePrefetcher.PRIORITY_ITEMS)
+    
+    def on_toggle_habitat(event):
+        game_state.current_screen = "main" if game_state.current_screen == "habitat" else "habitat"
+        renderer.invalidate()
+    
+    def open_animal(animal):
+        # ひろばでクリックしたケモノをメイン画面で開く
+        if animal in game_state.animals:
+            game_state.animals[game_state.selected_animal_index].release_caches()
+            game_state.selected_animal_index = game_state.animals.index(animal)
+            game_state.prefetch_neighbors(prefetcher)
+            autosaver.mark_dirty()
+        game_state.current_screen = "main"
+        renderer.invalidate()
+    
+    def on_item_clicked(item, event):
+        if game_state.selected_item:
+            renderer.invalidate(game_state.selected_item.rect)
+        renderer.invalidate(item.rect)
+        game_state.selected_item = item
+        log.debug(f"{item.name}を選択しました")
+    
+    def on_animal_clicked(event):
+        if event.button == 1:
+            if game_state.selected_item:
+                animal = game_state.animals[game_state.selected_animal_index]
+                item = game_state.selected_item
+                animal.record_item_use(item.name)
+                
+                if registry.is_favorite(animal, item):
+                    # 好物アイテム使用時の処理（不要なカウント処理を削除）
+                    animal.increase_affection(item.power)
+                    audio.play("happy")
+                else:
+                    if item.type == "food":
+                        audio.play("food")
+                    elif item.type == "toy":
+                        audio.play("toy")
+                
+        elif event.button == 3:
+            game_state.animals[game_state.selected_animal_index].release_caches()
+            game_state.selected_animal_index = (game_state.selected_animal_index + 1) % len(game_state.animals)
+            log.debug(f"ケモノを切り替え: {game_state.animals[game_state.selected_animal_index].name}")
+            game_state.prefetch_neighbors(prefetcher)
+            autosaver.mark_dirty()
+            audio.play("switch")
+    
+    dispatcher.on(pygame.QUIT, on_quit)
+    dispatcher.on(pygame.VIDEORESIZE, on_resize)
+    dispatcher.on_key(pygame.K_F3, on_toggle_profiler)
+    dispatcher.on_key(pygame.K_F4, lambda event: profiler.export())
+    title_screen.register_handlers(dispatcher, game_state)
+    for item in items:
+        dispatcher.add_region(item.design_rect, lambda event, item=item: on_item_clicked(item, event), screen="main")
+    # コレクション画面は手前に描くので、アイテムより後に登録する
+    collection_screen.register_handlers(dispatcher)
+    habitat.register_handlers(dispatcher, open_animal)
+    dispatcher.on_key(pygame.K_h, on_toggle_habitat, screen="main")
+    dispatcher.on_key(pygame.K_h, on_toggle_habitat, screen="habitat")
+    dispatcher.on_key(pygame.K_ESCAPE, on_toggle_habitat, screen="habitat")
+    dispatcher.on(pygame.MOUSEBUTTONDOWN, on_animal_clicked, screen="main")
+    
     while running:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                running = False
+        events_start = time.perf_counter()
+        if dispatcher.dispatch(pygame.event.get()):
+            scheduler.notify_input()
+        apply_pending_resize()
+        if profiler.enabled:
+            profiler.record("events", events_start, time.perf_counter())
+        
+        if game_state.current_screen == "title":
+            title_screen.loading_progress = prefetcher.progress
+            widgets = {"title": title_screen}
+        elif game_state.current_screen == "habitat":
+            habitat.sync(game_state.collected_animals)
+            with profiler.phase("Habitat.update"):
+                habitat.update()
+            widgets = {"habitat": habitat}
+        else:
+            current_animal = game_state.animals[game_state.selected_animal_index]
+            with profiler.phase("Animal.update"):
+                current_animal.update()
+            widgets = {"animal": current_animal, "collection": collection_screen}
+            for i, item in enumerate(items):
+                widgets[f"item{i}"] = item
+        
+        if game_state.current_screen == "habitat":
+            animating = habitat.count > 0
+        else:
+            animating = game_state.current_screen == "main" and (current_animal.is_animating or current_animal.particles.count > 0)
+        if profiler.overlay_visible:
+            renderer.invalidate(profiler.overlay_rect())
+        if renderer.begin_frame(widgets):
+            screen.fill((255, 255, 255))
             
             if game_state.current_screen == "title":
-                if title_screen.handle_event(event, game_state):
-                    continue
+                with profiler.phase("TitleScreen.draw"):
+                    title_screen.draw(screen)
             
             elif game_state.current_screen == "main":
-                if collection_screen.handle_event(event):
-                    continue
+                with profiler.phase("Animal.draw"):
+                    current_animal.draw(screen)
                 
-                if event.type == pygame.MOUSEBUTTONDOWN:
-                    for i, item in enumerate(items):
-                        if item.rect.collidepoint(event.pos):
-                            game_state.selected_item = item
-                            print(f"{item.name}を選択しました")
-                            break
-                    else:
-                        if event.button == 1:
-                            if game_state.selected_item:
-                                animal = game_state.animals[game_state.selected_animal_index]
-                                item = game_state.selected_item
-                                
-                                is_favorite = False
-                                if (item.type == "food" and item.name == animal.favorite_food) or \
-                                   (item.type == "toy" and item.name == animal.favorite_toy):
-                                    is_favorite = True
-                                
-                                if is_favorite:
-                                    # 好物アイテム使用時の処理（不要なカウント処理を削除）
-                                    animal.increase_affection(item.power)
-                                    if sounds["happy"]:
-                                        sounds["happy"].play()
-                                else:
-                                    if item.type == "food" and sounds["food"]:
-                                        sounds["food"].play()
-                                    elif item.type == "toy" and sounds["toy"]:
-                                        sounds["toy"].play()
-                                
-                                if not game_state.all_base_collected:
-                                    base_collected = all(a.collected for a in game_state.animals[:len(base_animal_data)])
-                                    if base_collected and game_state.hidden_animals:
-                                        game_state.animals.extend(game_state.hidden_animals)
-                                        game_state.all_base_collected = True
-                                        print("隠しケモノが解放されました！")
-                                        if sounds["happy"]:
-                                            sounds["happy"].play()
-                                
-                        elif event.button == 3:
-                            game_state.selected_animal_index = (game_state.selected_animal_index + 1) % len(game_state.animals)
-                            print(f"ケモノを切り替え: {game_state.animals[game_state.selected_animal_index].name}")
-                            if sounds["switch"]:
-                                sounds["switch"].play()
-        
-        screen.fill((255, 255, 255))
-        
-        if game_state.current_screen == "title":
-            title_screen.draw(screen)
-        
-        elif game_state.current_screen == "main":
-            current_animal = game_state.animals[game_state.selected_animal_index]
-            current_animal.update()
-            current_animal.draw(screen)
-            
-            for i, item in enumerate(items):
-                item.draw(screen, (50 + i * 60, 500))
+                with profiler.phase("Item.draw"):
+                    for item in items:
+                        item.draw(screen)
+                
+                if game_state.selected_item:
+                    pygame.draw.rect(screen, (0, 255, 0), game_state.selected_item.rect, layout.length(3))
+                
+                with profiler.phase("CollectionScreen.draw"):
+                    collection_screen.draw(screen)
             
-            if game_state.selected_item:
-                pygame.draw.rect(screen, (0, 255, 0), game_state.selected_item.rect, 3)
+            elif game_state.current_screen == "habitat":
+                with profiler.phase("Habitat.draw"):
+                    habitat.draw(screen)
             
-            collection_screen.draw(screen)
-
-        pygame.display.flip()
-        clock.tick(60)
-        await asyncio.sleep(0)  # 非同期処理のために必要
+            profiler.draw_overlay(screen)
+            with profiler.phase("display.flip"):
+                renderer.present(widgets)
+        profiler.end_frame()
+        log.flush()
+        if bgm_task is None:
+            bgm_task = asyncio.create_task(audio.play_bgm("assets/bgm_main.ogg", 0.2))  # 音量を20%に設定
+        await scheduler.wait_next_frame(animating)  # 非同期処理のためにも必要
 
+    prefetch_task.cancel()
+    autosave_task.cancel()
+    await autosaver.wait_writing()  # 書き込み中のスレッドと同じ一時ファイルを取り合わないように
+    autosaver.flush()
+    log.flush()
     pygame.mixer.music.stop()
     pygame.quit()
     sys.exit()
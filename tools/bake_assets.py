@@ -0,0 +1,118 @@
+"""表示サイズに縮小済みのアトラスを assets/baked に書き出す
+
+使い方: python tools/bake_assets.py [--check]
+kemono_data.json に載っている画像を、ゲームで使うサイズ（アイテム・ケモノ・
+コレクションのサムネイル・タイトル背景）ごとに1枚のアトラスへ詰め、
+zlib 圧縮した RGBA と manifest.json を作る。AssetLoader はこれがあれば優先して使う。
+manifest.json には元画像の大きさと CRC32 も書く。ゲームは大きさが変わった画像だけを
+元画像から読み込む。--check を付けると焼き直さずに CRC32 まで比べ、変わった元画像があれば
+一覧を出して終了コード1で終わる（Webビルドの前に実行する）。
+元画像や kemono_data.json を変えたら実行し直すこと。
+元画像は800x600以外の画面サイズのために残すので、配布サイズは減らない（起動時の展開と縮小が省ける）。
+"""
+import argparse
+import json
+import os
+import sys
+import zlib
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+pygame.init()  # main.py の読み込み時にフォントを初期化するため
+
+from main import Animal, AssetLoader, BakedAssets, CollectionScreen, EvolutionRules, Item, Registry, TitleScreen
+
+MAX_ATLAS_WIDTH = 2048
+
+
+def collect_jobs(registry):
+    """表示サイズ → そのサイズで使う画像パスの一覧"""
+    jobs = {}
+
+    def add(path, size):
+        resolved = AssetLoader.resolve_path(path)
+        if resolved is None:
+            print(f"警告: 画像が見つかりません: {path}")
+            return
+        paths = jobs.setdefault(tuple(size), [])
+        resolved = resolved.replace(os.sep, "/")
+        if resolved not in paths:
+            paths.append(resolved)
+
+    for data in registry.items_data:
+        add(data["image"], Item.IMAGE_SIZE)
+    for data in registry.animals_data + registry.hidden_animals_data:
+        add(data["base_image"], Animal.IMAGE_SIZE)
+        add(data["base_image"], CollectionScreen.THUMBNAIL_SIZE)
+        evolution = EvolutionRules.from_data(data["evolved_image"], data["base_image"])
+        for path in evolution.candidate_images():
+            add(path, Animal.IMAGE_SIZE)
+    add(TitleScreen.BACKGROUND_PATH, TitleScreen.BACKGROUND_SIZE)
+    return jobs
+
+
+def bake_atlas(paths, size):
+    columns = max(1, min(len(paths), MAX_ATLAS_WIDTH // size[0]))
+    rows = (len(paths) + columns - 1) // columns
+    atlas = pygame.Surface((columns * size[0], rows * size[1]), pygame.SRCALPHA)
+    entries = {}
+    for index, path in enumerate(paths):
+        x = (index % columns) * size[0]
+        y = (index // columns) * size[1]
+        # ゲームと同じ縮小処理を使う
+        atlas.blit(AssetLoader._decode_image(path, path, size), (x, y))
+        entries[path] = [x, y, size[0], size[1]]
+    return atlas, entries
+
+
+def check():
+    baked = BakedAssets.load()
+    if baked is None:
+        print("縮小済みアセットがありません")
+        return 1
+    stale = baked.stale_sources()
+    for path in stale:
+        print(f"焼いたときから変わっています: {path}")
+    if stale:
+        print("python tools/bake_assets.py で焼き直してください")
+        return 1
+    print(f"{len(baked.sources)}枚とも焼いたときのままです")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="表示サイズに縮小済みのアトラスを書き出す")
+    parser.add_argument("--check", action="store_true", help="焼き直さずに元画像が変わっていないか調べる")
+    args = parser.parse_args()
+    if args.check:
+        sys.exit(check())
+
+    pygame.display.set_mode((1, 1))  # convert_alpha のため
+    directory = BakedAssets.DIRECTORY
+    os.makedirs(directory, exist_ok=True)
+    atlases = {}
+    sources = {}
+    for size, paths in sorted(collect_jobs(Registry.load()).items()):
+        atlas, entries = bake_atlas(paths, size)
+        key = BakedAssets.size_key(size)
+        filename = f"{key}.bin"
+        data = zlib.compress(pygame.image.tostring(atlas, "RGBA"), 9)
+        with open(os.path.join(directory, filename), "wb") as f:
+            f.write(data)
+        atlases[key] = {"file": filename, "size": list(atlas.get_size()), "entries": entries}
+        for path in paths:
+            sources[path] = BakedAssets.source_info(path)
+        print(f"{key}: {len(paths)}枚 → {filename} ({len(data) / 1024:.0f} KB)")
+    with open(os.path.join(directory, BakedAssets.MANIFEST_NAME), "w", encoding="utf-8") as f:
+        json.dump({"version": BakedAssets.VERSION, "atlases": atlases, "sources": sources},
+                  f, ensure_ascii=False, indent=2)
+        f.write("\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,287 @@
+"""ヘッドレスのベンチマーク
+
+使い方: python tools/bench.py [--scenario 名前] [--output 結果.json] [--dirty-rects] [--screen-size 1280x720]
+SDLのダミードライバで main() を動かし、決められた入力を流し込んで
+シナリオごとに起動時間・フレーム時間（p50/p95/p99）・最大RSSをJSONで出力する。
+各シナリオは別プロセスで実行する（最大RSSを混ぜないため）。
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 座標は800x600の基準画面のもの（画面サイズを変えたときは main.layout で直す）
+ANIMAL_POS = (400, 300)
+START_BUTTON_POS = (400, 420)
+
+
+def item_pos(registry, name):
+    # Registry.create_items と同じ並べ方
+    index = [data["name"] for data in registry.items_data].index(name)
+    return (50 + index * 60 + 25, 525)
+
+
+def click(pos, button=1):
+    return ("mouse", pos, button)
+
+
+def key(k):
+    return ("key", k)
+
+
+def drag(start, end, steps=10):
+    """左ボタンを押したまま start から end まで動かす"""
+    dx = (end[0] - start[0]) // steps
+    dy = (end[1] - start[1]) // steps
+    moves = [("motion", (start[0] + dx * i, start[1] + dy * i), (dx, dy)) for i in range(1, steps + 1)]
+    return [click(start)] + [step for move in moves for step in (move, wait(1))] + [("release", end)]
+
+
+def wheel(y):
+    return ("wheel", y)
+
+
+def wait(frames):
+    return ("wait", frames)
+
+
+def start_game():
+    return [wait(5), click(START_BUTTON_POS), wait(5)]
+
+
+def feed(registry, item, times, interval=3):
+    steps = [click(item_pos(registry, item)), wait(interval)]
+    for _ in range(times):
+        steps += [click(ANIMAL_POS), wait(interval)]
+    return steps
+
+
+def favorite_of(registry, data):
+    return sorted(registry.favorites_by_animal[data["name"]])[0]
+
+
+def scenario_title(registry):
+    return start_game() + [wait(60)]
+
+
+def scenario_select_items(registry):
+    steps = start_game()
+    for data in registry.items_data:
+        steps += [click(item_pos(registry, data["name"])), wait(5)]
+    return steps + [wait(30)]
+
+
+def scenario_evolve(registry):
+    # 最初のケモノに好物を20回あげて進化させ、演出が終わるまで待つ
+    favorite = favorite_of(registry, registry.animals_data[0])
+    return start_game() + feed(registry, favorite, 20) + [wait(90)]
+
+
+def scenario_switch(registry):
+    steps = start_game()
+    for _ in range(14):
+        steps += [click(ANIMAL_POS, button=3), wait(10)]
+    return steps
+
+
+def collect_all(registry):
+    # 基本ケモノを全員コレクションして隠しケモノを出す
+    steps = start_game()
+    for data in registry.animals_data:
+        steps += feed(registry, favorite_of(registry, data), 10, interval=2)
+        steps += [click(ANIMAL_POS, button=3), wait(2)]
+    return steps
+
+
+def scenario_collection(registry):
+    # 全員コレクションしてから、コレクション画面をめくる
+    steps = collect_all(registry) + [key("c"), wait(20)]
+    for _ in range(3):
+        steps += [key("right"), wait(20), key("left"), wait(20)]
+    return steps + [key("c"), wait(10)]
+
+
+def scenario_habitat(registry):
+    # 全員コレクションしてからひろばを開き、ドラッグとズームで見回す
+    steps = collect_all(registry) + [key("h"), wait(60)]
+    steps += drag((600, 400), (200, 200)) + [wait(30)]
+    for y in (-1, -1, 1, 1):
+        steps += [wheel(y), wait(30)]
+    return steps + [key("h"), wait(10)]
+
+
+SCENARIOS = {
+    "title": scenario_title,
+    "select_items": scenario_select_items,
+    "evolve": scenario_evolve,
+    "switch_animals": scenario_switch,
+    "collection": scenario_collection,
+    "habitat": scenario_habitat,
+    "habitat_crowd": scenario_habitat,
+}
+
+# シナリオを始める前に main モジュールに加える変更
+SCENARIO_SETUP = {
+    # 1種類あたり50匹（隠しケモノも含めて数百匹）にする
+    "habitat_crowd": lambda main: setattr(main.Habitat, "RESIDENTS_PER_ANIMAL", 50),
+}
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def run_scenario(name):
+    """子プロセス側：1つのシナリオを実行して結果の辞書を返す"""
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    sys.path.insert(0, ROOT)
+    os.chdir(ROOT)
+
+    started = time.perf_counter()
+    import pygame
+    pygame.init()  # main.py の読み込み時にフォントを初期化するため
+    import main
+
+    keys = {"c": pygame.K_c, "h": pygame.K_h, "right": pygame.K_RIGHT, "left": pygame.K_LEFT}
+    steps = list(SCENARIOS[name](main.Registry.load()))
+    if name in SCENARIO_SETUP:
+        SCENARIO_SETUP[name](main)
+    frame_times = []
+    result = {"startup_ms": None}
+
+    def post_input(step):
+        if step[0] == "mouse":
+            _, pos, button = step
+            pygame.event.post(pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=main.layout.point(*pos), button=button))
+        elif step[0] == "key":
+            # 離さないと押しっぱなしとして次の KEYDOWN がまとめられる
+            pygame.event.post(pygame.event.Event(pygame.KEYDOWN, key=keys[step[1]]))
+            pygame.event.post(pygame.event.Event(pygame.KEYUP, key=keys[step[1]]))
+        elif step[0] == "motion":
+            _, pos, rel = step
+            rel = (round(rel[0] * main.layout.scale), round(rel[1] * main.layout.scale))
+            pygame.event.post(pygame.event.Event(pygame.MOUSEMOTION, pos=main.layout.point(*pos), rel=rel, buttons=(1, 0, 0)))
+        elif step[0] == "release":
+            pygame.event.post(pygame.event.Event(pygame.MOUSEBUTTONUP, pos=main.layout.point(*step[1]), button=1))
+        elif step[0] == "wheel":
+            pygame.event.post(pygame.event.Event(pygame.MOUSEWHEEL, x=0, y=step[1]))
+
+    class BenchScheduler(main.FrameScheduler):
+        """待たずに次のフレームへ進み、1フレームの処理時間を記録する
+
+        1フレームは wait_next_frame に入ってから次に入るまでの実時間で数えるので、
+        ループに処理を返している間に動く先読み・オートセーブ・BGMのタスクの時間も含まれる。
+        """
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self._waiting = 0
+            self._frame_start = time.perf_counter()
+
+        async def wait_next_frame(self, animating=False):
+            now = time.perf_counter()
+            if result["startup_ms"] is None:
+                result["startup_ms"] = (now - started) * 1000
+            else:
+                frame_times.append((now - self._frame_start) * 1000)
+            self.frame_time = now - self._frame_start
+            # 先読みには本物のループと同じく、60fpsの締め切りまでの残り時間だけを使わせる
+            self.deadline = self._frame_start + 1.0 / self.active_fps
+            self._frame_start = now
+            # 台本を1フレーム分進める
+            if self._waiting > 0:
+                self._waiting -= 1
+            while self._waiting == 0:
+                if not steps:
+                    pygame.event.post(pygame.event.Event(pygame.QUIT))
+                    break
+                step = steps.pop(0)
+                if step[0] == "wait":
+                    self._waiting = step[1]
+                else:
+                    post_input(step)
+            await asyncio.sleep(0)
+
+    main.FrameScheduler = BenchScheduler
+    with contextlib.redirect_stdout(io.StringIO()):
+        try:
+            asyncio.run(main.main())
+        except SystemExit:
+            pass
+
+    result.update({
+        "frames": len(frame_times),
+        "frame_ms": {
+            "p50": percentile(frame_times, 50),
+            "p95": percentile(frame_times, 95),
+            "p99": percentile(frame_times, 99),
+            "max": max(frame_times, default=0.0),
+        },
+        # Linuxでは KB 単位
+        "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    })
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Kemono Atsume のヘッドレスベンチマーク")
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), action="append",
+                        help="実行するシナリオ（複数指定可、省略時はすべて）")
+    parser.add_argument("--output", help="結果のJSONを書き出すファイル")
+    parser.add_argument("--dirty-rects", action="store_true", help="差分描画モードで計測する")
+    parser.add_argument("--screen-size", help="画面サイズ（例: 1280x720、省略時は800x600）")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_scenario(args.child)))
+        return
+
+    env = dict(os.environ)
+    env["KEMONO_SAVE_PATH"] = ""  # セーブデータを読み書きしない（毎回同じ状態から計測する）
+    if args.dirty_rects:
+        env["KEMONO_DIRTY_RECTS"] = "1"
+    if args.screen_size:
+        env["KEMONO_SCREEN_SIZE"] = args.screen_size
+    results = {}
+    for name in args.scenario or list(SCENARIOS):
+        completed = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--child", name],
+            env=env, capture_output=True, text=True, check=True,
+        )
+        results[name] = json.loads(completed.stdout.strip().splitlines()[-1])
+        frame_ms = results[name]["frame_ms"]
+        print(f"{name:15s} 起動 {results[name]['startup_ms']:7.1f} ms  "
+              f"p50 {frame_ms['p50']:6.2f}  p95 {frame_ms['p95']:6.2f}  p99 {frame_ms['p99']:6.2f} ms  "
+              f"RSS {results[name]['peak_rss_kb'] / 1024:.1f} MB", file=sys.stderr)
+
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "dirty_rects": args.dirty_rects,
+        "screen_size": args.screen_size or "800x600",
+        "scenarios": results,
+    }
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""進化フェードイン描画のマイクロベンチマーク
+
+使い方: python tools/bench_fade.py [フレーム数]
+以前の描画方法（毎フレーム一時Surfaceを作る）と現在の Animal.draw を比べ、
+1フレームあたりの Surface 生成数と描画時間を表示する。
+生成数は pygame.Surface のコンストラクタと pygame.transform の関数を差し替えて数え、
+ケモノの画像は Surface を数えるサブクラスに入れ替えて copy() / convert() なども数える
+（ゲーム側にカウンタを置かなくても、新しく Surface を作るようになれば数に出る）。
+"""
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+pygame.init()  # main.py の読み込み時にフォントを初期化するため
+
+import main
+
+
+class SurfaceCounter:
+    """Surface を新しく作る呼び出しを数える"""
+    TRANSFORMS = ("scale", "smoothscale", "scale2x", "rotate", "rotozoom", "flip")
+
+    def __init__(self):
+        self.created = 0
+        self._originals = {}
+
+    def install(self):
+        counter = self
+        original_surface = pygame.Surface
+
+        class CountingSurface(original_surface):
+            def __init__(self, *args, **kwargs):
+                counter.created += 1
+                super().__init__(*args, **kwargs)
+
+            def copy(self):
+                counter.created += 1
+                return super().copy()
+
+            def convert(self, *args):
+                counter.created += 1
+                return super().convert(*args)
+
+            def convert_alpha(self, *args):
+                counter.created += 1
+                return super().convert_alpha(*args)
+
+        self.surface_class = CountingSurface
+        self._originals[(pygame, "Surface")] = original_surface
+        pygame.Surface = CountingSurface
+        for name in self.TRANSFORMS:
+            original = getattr(pygame.transform, name)
+            self._originals[(pygame.transform, name)] = original
+            setattr(pygame.transform, name, self._wrap(original))
+
+    def _wrap(self, function):
+        def counted(*args, **kwargs):
+            self.created += 1
+            return function(*args, **kwargs)
+        return counted
+
+    def uninstall(self):
+        for (module, name), original in self._originals.items():
+            setattr(module, name, original)
+
+    def adopt(self, image):
+        """image と同じ内容の、copy() なども数えられる Surface"""
+        counted = self.surface_class(image.get_size(), pygame.SRCALPHA)
+        counted.blit(image, (0, 0))
+        return counted
+
+
+class FixedImage:
+    """LazyImage の代わりに決まった Surface を返すハンドル"""
+    def __init__(self, surface, path):
+        self.surface = surface
+        self.path = path
+        self.loaded = True
+        self.provisional = False
+
+    def get(self):
+        return self.surface
+
+    def load(self):
+        pass
+
+    def release(self):
+        pass
+
+
+def legacy_fade(screen, image, rect, frame):
+    # 変更前の Animal.draw のフェードイン処理
+    alpha = min(255, frame * 15)
+    temp_surface = pygame.Surface((image.get_width(), image.get_height()), pygame.SRCALPHA)
+    temp_surface.blit(image, (0, 0))
+    temp_surface.set_alpha(alpha)
+    screen.blit(temp_surface, rect)
+
+
+def current_fade(screen, animal, frame):
+    alpha = min(255, frame * 15)
+    screen.blit(animal.faded_image(alpha), animal.rect)
+
+
+def measure(name, draw, frames, counter):
+    draw(0)  # 初回だけの準備は計測しない
+    counter.created = 0
+    start = time.perf_counter()
+    for frame in range(frames):
+        draw(frame % 30)
+    elapsed = time.perf_counter() - start
+    print(f"{name:8s} Surface生成/フレーム: {counter.created / frames:.2f}  "
+          f"描画時間/フレーム: {elapsed / frames * 1000:.3f} ms")
+
+
+def run():
+    frames = int(sys.argv[1]) if len(sys.argv) > 1 else 3000
+    screen = pygame.display.set_mode((800, 600))
+    animal = main.Animal("Cat", "Fish", "Ball", "assets/cat_2.png", "assets/universe.PNG")
+    counter = SurfaceCounter()
+    counter.install()
+    try:
+        image = counter.adopt(animal.evolved_image.get())
+        animal.current_image = FixedImage(image, animal.evolved_image.path)
+        measure("before", lambda f: legacy_fade(screen, image, animal.rect, f), frames, counter)
+        measure("after", lambda f: current_fade(screen, animal, f), frames, counter)
+    finally:
+        counter.uninstall()
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,27 @@
+"""assets/manifest.json を生成する
+
+使い方: python tools/build_manifest.py [アセットフォルダ]
+Webビルド（pygbag）の前に実行しておくと、実行時のフォルダ走査が不要になる。
+"""
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import pygame
+pygame.init()  # main.py の読み込み時にフォントを初期化するため
+
+from main import AssetManifest
+
+
+def main():
+    directory = sys.argv[1] if len(sys.argv) > 1 else "assets"
+    manifest = AssetManifest.build(directory)
+    path = manifest.save()
+    print(f"{path} に {len(manifest.files)} 件を書き出しました")
+
+
+if __name__ == "__main__":
+    main()
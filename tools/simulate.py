@@ -0,0 +1,226 @@
+"""親密度と進化のバランス調整用の一括シミュレーション
+
+使い方: python tools/simulate.py [--players 1000000] [--strategy focused] [--output 結果.json]
+大量のプレイヤーの状態を NumPy の配列で持ち、アイテムを1回使うごとに全員分をまとめて進める。
+回数はプレイ開始からの通算のアイテム使用回数（ケモノの切り替えやアイテムの選択は数えない）。
+好物・アイテムの強さ・進化の分岐は kemono_data.json（Registry / EvolutionRules）、
+親密度のしきい値は Animal のものをそのまま使うので、ゲーム本体と同じ規則で計算される。
+
+作戦:
+  random  … 出会えるケモノとアイテムを毎回でたらめに選ぶ
+  focused … 進化していない最初のケモノに好物だけをあげ続ける
+  mixed   … focused と同じケモノに、--favorite-rate の確率で好物、それ以外はでたらめなアイテム
+"""
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+pygame.init()  # main.py の読み込み時にフォントを初期化するため
+
+from main import Animal, EvolutionRules, Registry
+
+STRATEGIES = ("random", "focused", "mixed")
+
+
+class Rules:
+    """Registry の定義を配列にしたもの"""
+    def __init__(self, registry):
+        self.animals = registry.animals_data + registry.hidden_animals_data
+        self.base_count = registry.base_count
+        self.item_names = [data["name"] for data in registry.items_data]
+        self.item_index = {name: i for i, name in enumerate(self.item_names)}
+        self.power = np.array([data.get("power", 1) for data in registry.items_data], np.int16)
+        # favorite[a, i]: ケモノ a にとってアイテム i が好物か
+        self.favorite = np.zeros((len(self.animals), len(self.item_names)), bool)
+        for a, data in enumerate(self.animals):
+            for item_name in registry.favorites_by_animal[data["name"]]:
+                self.favorite[a, self.item_index[item_name]] = True
+        # 好物が無いケモノには focused 作戦で適当なアイテムを使う
+        self.first_favorite = np.where(self.favorite.any(axis=1), self.favorite.argmax(axis=1), 0)
+        self.evolutions = [EvolutionRules.from_data(data["evolved_image"], data["base_image"]) for data in self.animals]
+
+
+class Batch:
+    """プレイヤー n 人分の状態"""
+    def __init__(self, rules, n):
+        a = len(rules.animals)
+        self.rules = rules
+        self.n = n
+        self.affection = np.zeros((n, a), np.int16)
+        self.collected = np.zeros((n, a), bool)
+        self.evolved = np.zeros((n, a), bool)
+        self.item_counts = np.zeros((n, a, len(rules.item_names)), np.int16)
+        self.unlocked = np.zeros(n, bool)
+        self.clicks_to_collect = np.full((n, a), -1, np.int32)
+        self.clicks_to_evolve = np.full((n, a), -1, np.int32)
+        self.clicks_to_unlock = np.full(n, -1, np.int32)
+        self.branch = np.full((n, a), -1, np.int8)  # 進化の分岐（-1 は default）
+
+    def available(self):
+        """出会えるケモノの数（隠しケモノは解放後のみ）"""
+        return np.where(self.unlocked, len(self.rules.animals), self.rules.base_count)
+
+    def choose(self, strategy, favorite_rate, rng):
+        rules = self.rules
+        available = self.available()
+        if strategy == "random":
+            animal = (rng.random(self.n) * available).astype(np.int64)
+            item = rng.integers(0, len(rules.item_names), self.n)
+            return animal, item, np.ones(self.n, bool)
+        # 進化していない最初のケモノを狙う
+        reachable = np.arange(len(rules.animals))[None, :] < available[:, None]
+        todo = ~self.evolved & reachable
+        active = todo.any(axis=1)
+        animal = todo.argmax(axis=1)
+        item = rules.first_favorite[animal]
+        if strategy == "mixed":
+            use_random = rng.random(self.n) >= favorite_rate
+            item = np.where(use_random, rng.integers(0, len(rules.item_names), self.n), item)
+        return animal, item, active
+
+    def step(self, click, animal, item, active):
+        rules = self.rules
+        players = np.nonzero(active)[0]
+        animal = animal[players]
+        item = item[players]
+        self.item_counts[players, animal, item] += 1
+        gain = np.where(rules.favorite[animal, item], rules.power[item], 0)
+        affection = np.minimum(Animal.MAX_AFFECTION, self.affection[players, animal] + gain)
+        self.affection[players, animal] = affection
+
+        newly_collected = (affection >= Animal.COLLECT_AFFECTION) & ~self.collected[players, animal]
+        who = players[newly_collected]
+        self.collected[who, animal[newly_collected]] = True
+        self.clicks_to_collect[who, animal[newly_collected]] = click
+
+        newly_evolved = (affection >= Animal.EVOLVE_AFFECTION) & ~self.evolved[players, animal]
+        who = players[newly_evolved]
+        evolved_animal = animal[newly_evolved]
+        self.evolved[who, evolved_animal] = True
+        self.clicks_to_evolve[who, evolved_animal] = click
+        self.choose_branches(who, evolved_animal)
+
+        # 基本ケモノが全員そろったら隠しケモノを解放
+        newly_unlocked = ~self.unlocked & self.collected[:, :rules.base_count].all(axis=1)
+        self.unlocked |= newly_unlocked
+        self.clicks_to_unlock[newly_unlocked] = click
+
+    def choose_branches(self, players, animals):
+        """EvolutionRules と同じ条件で分岐を決める（上から順に最初に当てはまったもの）"""
+        for a, evolution in enumerate(self.rules.evolutions):
+            if not evolution.branches:
+                continue
+            who = players[animals == a]
+            if who.size == 0:
+                continue
+            counts = self.item_counts[who, a]
+            undecided = np.ones(who.size, bool)
+            for b, branch in enumerate(evolution.branches):
+                matched = undecided.copy()
+                for left, op, right in branch.get("conditions", []):
+                    matched &= EvolutionRules.OPERATORS[op](self._term(left, counts), self._term(right, counts))
+                self.branch[who[matched], a] = b
+                undecided &= ~matched
+
+    def _term(self, term, counts):
+        if isinstance(term, str):
+            index = self.rules.item_index.get(term)
+            return counts[:, index] if index is not None else np.zeros(counts.shape[0], np.int16)
+        return term
+
+
+def summarize(values):
+    reached = values[values >= 0]
+    if reached.size == 0:
+        return {"reached": 0.0}
+    p10, p50, p90, p99 = np.percentile(reached, [10, 50, 90, 99])
+    return {
+        "reached": reached.size / values.size,
+        "mean": float(reached.mean()),
+        "p10": float(p10), "p50": float(p50), "p90": float(p90), "p99": float(p99),
+    }
+
+
+def simulate(rules, players, strategy, favorite_rate, max_clicks, batch_size, seed):
+    rng = np.random.default_rng(seed)
+    collect, evolve, unlock, branches = [], [], [], []
+    remaining = players
+    while remaining > 0:
+        n = min(batch_size, remaining)
+        batch = Batch(rules, n)
+        for click in range(1, max_clicks + 1):
+            animal, item, active = batch.choose(strategy, favorite_rate, rng)
+            if not active.any():
+                break
+            batch.step(click, animal, item, active)
+        collect.append(batch.clicks_to_collect)
+        evolve.append(batch.clicks_to_evolve)
+        unlock.append(batch.clicks_to_unlock)
+        branches.append(batch.branch)
+        remaining -= n
+
+    collect = np.concatenate(collect)
+    evolve = np.concatenate(evolve)
+    branches = np.concatenate(branches)
+    report = {"animals": {}, "clicks_to_unlock_hidden": summarize(np.concatenate(unlock))}
+    for a, data in enumerate(rules.animals):
+        entry = {
+            "clicks_to_collect": summarize(collect[:, a]),
+            "clicks_to_evolve": summarize(evolve[:, a]),
+        }
+        evolution = rules.evolutions[a]
+        if evolution.branches:
+            evolved = evolve[:, a] >= 0
+            names = [branch.get("name", str(b)) for b, branch in enumerate(evolution.branches)]
+            entry["branches"] = {
+                name: float((branches[evolved, a] == b).mean()) if evolved.any() else 0.0
+                for b, name in enumerate(names)
+            }
+            entry["branches"]["default"] = float((branches[evolved, a] == -1).mean()) if evolved.any() else 0.0
+        report["animals"][data["name"]] = entry
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="親密度と進化のバランス調整用シミュレーション")
+    parser.add_argument("--players", type=int, default=100000)
+    parser.add_argument("--strategy", choices=STRATEGIES, default="focused")
+    parser.add_argument("--favorite-rate", type=float, default=0.5, help="mixed 作戦で好物を選ぶ確率")
+    parser.add_argument("--max-clicks", type=int, default=2000, help="1人あたりのアイテム使用回数の上限")
+    parser.add_argument("--batch-size", type=int, default=100000, help="一度に配列に載せる人数")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--data", help="kemono_data.json の場所")
+    parser.add_argument("--output", help="結果のJSONを書き出すファイル")
+    args = parser.parse_args()
+
+    rules = Rules(Registry.load(args.data))
+    report = simulate(rules, args.players, args.strategy, args.favorite_rate,
+                      args.max_clicks, args.batch_size, args.seed)
+    report["settings"] = vars(args)
+    report["thresholds"] = {"collect": Animal.COLLECT_AFFECTION, "evolve": Animal.EVOLVE_AFFECTION}
+
+    for name, entry in report["animals"].items():
+        collect = entry["clicks_to_collect"]
+        evolve = entry["clicks_to_evolve"]
+        print(f"{name:10s} コレクション p50 {collect.get('p50', float('nan')):7.1f} ({collect['reached']:.0%})  "
+              f"進化 p50 {evolve.get('p50', float('nan')):7.1f} ({evolve['reached']:.0%})", file=sys.stderr)
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()